@@ -1,7 +1,8 @@
 # coding=utf8
 import math
 import numpy as np
-from util import common
+from util.history_planes import HistoryPlanes
+import threading
 import time
 
 
@@ -9,21 +10,65 @@ class Mcts(object):
     START = []
 
     def __init__(self, state, env, model, max_simulation=500, winner_reward=1., loser_reward=-1., c_puct=0.01,
-                 init_root_edges=False, num_state_history=7, print_mcts_search=True):
+                 init_root_edges=False, num_state_history=7, print_mcts_search=True, num_parallel_leaves=1,
+                 virtual_loss=1., num_search_threads=1, use_transposition_table=False, max_nodes=None,
+                 prune_ratio=0.75, early_stop=False):
         self.env = env
         self.model = model
         self.max_simulation = max_simulation
-        self.root_node = Node(state)
+        # nodes keep the native engine state, planes are only built for the model input
+        board = env.get_board(state)
+        self.root_node = Node(board, state_hash=env.get_state_hash(board))
         self.selected_edges = []
+        self.selected_nodes = []
         self.action_history = []
-        self.state_history = [state]
         self.current_node = self.root_node
         self.temperature = .0
         self.winner_reward = winner_reward
         self.loser_reward = loser_reward
         self.c_puct = c_puct
         self.num_state_history = num_state_history
+        # planes of the last positions of the selected path, a select pushes the planes of the node it moves to.
+        # root_history holds the root alone and starts every path, it is made again when the root changes
+        self.history_planes = HistoryPlanes(num_state_history)
+        self.root_history = HistoryPlanes(num_state_history)
+        self.root_history_node = None
+        self.init_state()
         self.print_mcts_search = print_mcts_search
+        # leaves selected per round and evaluated in one model batch, 1 evaluates every leaf on its own
+        self.num_parallel_leaves = num_parallel_leaves
+        self.virtual_loss = virtual_loss
+        # threads running simulations on the tree, every tree change happens under tree_lock
+        self.num_search_threads = num_search_threads
+        if num_search_threads > 1 and num_parallel_leaves > 1:
+            raise Exception("num_parallel_leaves and num_search_threads can't be used together")
+        self.tree_lock = threading.Lock()
+        # simulations the current search has backed up, the ones started on threads, and the wall clock deadline of a
+        # time budgeted search
+        self.num_simulations = 0
+        self.num_started_simulations = 0
+        self.deadline = None
+        # a search stops once more simulations can't change its move, see can_stop_early
+        self.early_stop = early_stop
+        self.search_start_visit_count = 0
+        self.num_saved_simulations = 0
+        # leaves waiting for their evaluation -> [(selected nodes, selected edges) of every path ending there]
+        self.pending_leaves = {}
+        # (state hash, turn) -> node, a position reached by another move order shares the node, its edge statistics
+        # and the priors of its one model evaluation. the history planes of the first path are the ones evaluated.
+        self.transpositions = None
+        if use_transposition_table:
+            self.transpositions = {(self.root_node.state_hash, board.turn): self.root_node}
+        # node budget of the tree. with max_nodes the subtrees left behind by a new root are released, and the least
+        # visited subtrees are cut down to prune_ratio * max_nodes nodes when the budget is reached. released nodes
+        # wait in node_pool for the next expansions.
+        self.max_nodes = max_nodes
+        self.prune_ratio = prune_ratio
+        self.num_nodes = 1
+        self.node_pool = []
+        # node count which starts the next prune. a prune which can't cut the protected paths lets the tree overshoot
+        # the budget for a while instead of scanning the tree again on every new node
+        self.prune_num_nodes = max_nodes
         if init_root_edges:
             self.expand_and_evaluate()
 
@@ -39,15 +84,31 @@ class Mcts(object):
         else:
             Mcts.START.append(time.time())
 
-    def search(self, temperature=.0, action_idx_list=[]):
+    def search(self, temperature=.0, action_idx_list=[], time_budget_ms=None):
+        """Runs max_simulation simulations, or with time_budget_ms as many as fit in that many milliseconds, from the
+        root reached by action_idx_list and returns the policy of the root edges.
+
+        A time budgeted search runs at least one simulation, so the root is expanded and the policy is valid however
+        short the budget is. num_simulations holds the simulations the search completed.
+        """
         self.temperature = temperature
+        self.num_simulations = 0
+        self.num_saved_simulations = 0
+        self.deadline = None if time_budget_ms is None else time.time() + time_budget_ms / 1000.
         if len(action_idx_list) > 0:
+            old_nodes = self.get_tree_nodes(self.root_node) if self.max_nodes else None
             for action_idx in action_idx_list:
                 if not self.root_node.edges:
                     self.expand_and_evaluate()
-                self.root_node = self.root_node.edges[action_idx].node
+                self.root_node = self.get_child_node(self.root_node, self.root_node.edges[action_idx])
             self.root_node.parent_edge = None
             self.root_node.parent_node = None
+            if self.max_nodes:
+                self.init_state()
+                self.sweep(old_nodes)
+            elif self.transpositions is not None:
+                self.rebuild_transpositions()
+        self.search_start_visit_count = self.root_node.total_visit_count
         if self.root_node.edges is not None:
             # visits = []
             # for edge in self.root_node.edges:
@@ -62,13 +123,32 @@ class Mcts(object):
             for i, edge in enumerate(self.root_node.edges):
                 edge.add_noise(noise_probs[i])
 
-        for i in range(self.max_simulation):
-            self.log("mcts simulate %d " % i)
+        if self.num_search_threads > 1:
+            self.log("mcts simulate on %d threads" % self.num_search_threads)
 
-            self.simulate()
+            self.simulate_in_threads()
+        elif self.num_parallel_leaves > 1:
+            while not self.is_search_done():
+                num_leaves = self.num_parallel_leaves
+                if self.deadline is None:
+                    num_leaves = min(num_leaves, self.max_simulation - self.num_simulations)
+                self.log("mcts simulate %d-%d " % (self.num_simulations, self.num_simulations + num_leaves - 1))
 
-        action_probs = np.array(
-            [edge.get_action_probs(self.root_node.edges, self.temperature) for edge in self.root_node.edges])
+                self.simulate_batch(num_leaves)
+        else:
+            while not self.is_search_done():
+                self.log("mcts simulate %d " % self.num_simulations)
+
+                self.simulate()
+                self.num_simulations += 1
+        if self.deadline is not None:
+            self.log("mcts %d simulations in %d ms" % (self.num_simulations, time_budget_ms))
+        elif self.num_simulations < self.max_simulation:
+            self.num_saved_simulations = self.max_simulation - self.num_simulations
+            self.log("mcts stopped early, %d of %d simulations saved" % (self.num_saved_simulations,
+                                                                          self.max_simulation))
+
+        action_probs = self.get_action_probs(self.root_node)
         self.log("MCTS root edges")
 
         for i, edge in enumerate(self.root_node.edges):
@@ -108,6 +188,136 @@ class Mcts(object):
 
         self.backup(state_value)
 
+    def simulate_batch(self, num_leaves):
+        """Selects num_leaves leaves, evaluates the new ones in one model batch and backs every path up."""
+        self.init_state()
+        leaves = []
+        model_inputs = []
+        for _ in range(num_leaves):
+            leaf, model_input = self.select_leaf()
+            if model_input is not None:
+                leaves.append(leaf)
+                model_inputs.append(model_input)
+
+        if not leaves:
+            return
+        self.log("MCTS batch inference", len(leaves))
+        action_probs_list, state_values = self.model.inference_batch(np.array(model_inputs))
+        for i, leaf in enumerate(leaves):
+            self.backup_leaf(leaf, self.expand(leaf, action_probs_list[i], state_values[i]))
+
+    def is_search_done(self):
+        if self.early_stop and self.can_stop_early():
+            return True
+        if self.deadline is not None:
+            # at least one simulation, the root has no edges before
+            return self.num_simulations > 0 and time.time() >= self.deadline
+        return self.num_simulations >= self.max_simulation
+
+    def can_stop_early(self):
+        """Whether the rest of the simulations can't change the move of the search.
+
+        With one legal move there is nothing to search. At temperature 0 the most visited root edge is played, so a
+        fixed count search is over once it leads the runner-up by more visits than the simulations of the search not
+        backed up yet, the ones running on the other threads included, could add to the runner-up.
+        """
+        edges = self.root_node.edges
+        if not edges:
+            return False
+        if len(edges) == 1:
+            return True
+        if self.temperature != 0 or self.deadline is not None:
+            return False
+        remaining = self.max_simulation - (self.root_node.total_visit_count - self.search_start_visit_count)
+        second, best = np.partition([edge.visit_count for edge in edges], -2)[-2:]
+        return best - second > remaining
+
+    def simulate_in_threads(self):
+        """Runs the simulations of the search on num_search_threads threads sharing the tree.
+
+        A thread selects a leaf and later expands it and backs it up holding tree_lock, and runs the model without
+        it. sess.run releases the GIL, so the tree work of the other threads goes on while a leaf is evaluated.
+        """
+        self.init_state()
+        if not self.root_node.edges:
+            # every thread would wait on the root otherwise
+            self.simulate()
+            self.num_simulations += 1
+        self.num_started_simulations = self.num_simulations
+        errors = []
+        threads = [threading.Thread(target=self.run_search_thread, args=(errors,))
+                   for _ in range(self.num_search_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def run_search_thread(self, errors):
+        try:
+            while True:
+                with self.tree_lock:
+                    # num_simulations only counts the backed up simulations, the started ones keep a fixed count
+                    # search from starting more than max_simulation
+                    if errors or self.is_search_done() or (
+                            self.deadline is None and self.num_started_simulations >= self.max_simulation):
+                        return
+                    self.num_started_simulations += 1
+                    leaf, model_input = self.select_leaf()
+                if model_input is None:
+                    continue
+
+                action_probs, state_value = self.model.inference(model_input)
+
+                with self.tree_lock:
+                    self.backup_leaf(leaf, self.expand(leaf, action_probs, state_value))
+        except Exception as e:
+            errors.append(e)
+
+    def select_leaf(self):
+        """Selects a leaf and holds a virtual loss on every edge of its path until backup_leaf.
+
+        Returns (leaf, model input). The model input is None when the leaf needs no evaluation: a repeated or
+        finished game is backed up right away, and a path ending on a leaf already waiting for its evaluation is
+        backed up with the value of that leaf, so the leaf is expanded once.
+        """
+        is_leaf_node = False
+        while not is_leaf_node:
+            is_leaf_node = self.select()
+
+        if is_leaf_node == 2:
+            self.backup(-1)
+            self.num_simulations += 1
+            return None, None
+
+        leaf = self.current_node
+        if self.env.is_over(leaf.state, leaf.state_hash):
+            self.backup(self.loser_reward)
+            self.num_simulations += 1
+            return None, None
+
+        for edge in self.selected_edges:
+            edge.virtual_loss_count += 1
+        model_input = None
+        if leaf in self.pending_leaves:
+            self.pending_leaves[leaf].append((self.selected_nodes, self.selected_edges))
+        else:
+            self.pending_leaves[leaf] = [(self.selected_nodes, self.selected_edges)]
+            model_input = self.history_planes.get_model_input()
+        self.init_state()
+        return leaf, model_input
+
+    def backup_leaf(self, leaf, state_value):
+        # a simulation is counted in num_simulations once it is backed up
+        for selected_nodes, selected_edges in self.pending_leaves.pop(leaf):
+            for edge in selected_edges:
+                edge.virtual_loss_count -= 1
+            self.selected_nodes = selected_nodes
+            self.selected_edges = selected_edges
+            self.backup(state_value)
+            self.num_simulations += 1
+
     def choice_edge_idx(self, select_scores):
         if (select_scores == 0).all():
             edge_idx = np.random.choice(len(select_scores), 1)[0]
@@ -127,7 +337,7 @@ class Mcts(object):
         no_visited_idx_list = []
 
         for i, edge in enumerate(self.current_node.edges):
-            if edge.visit_count == 0:
+            if edge.visit_count == 0 and edge.virtual_loss_count == 0:
                 no_visited_idx_list.append(i)
 
         if len(no_visited_idx_list) == 0:
@@ -145,6 +355,136 @@ class Mcts(object):
 
         return edge_idx
 
+    def get_select_scores(self, node):
+        edges = node.edges
+        visit_counts = np.array([edge.visit_count for edge in edges])
+        action_probs = np.array([edge.action_prob for edge in edges])
+        mean_action_values = np.array([edge.mean_action_value for edge in edges])
+        rewards = np.array([edge.reward for edge in edges])
+        total_visit_count = node.total_visit_count
+        if self.pending_leaves:
+            # a pending leaf counts as a lost visit of every edge above it
+            virtual_loss_counts = np.array([edge.virtual_loss_count for edge in edges])
+            total_action_values = np.array([edge.total_action_value for edge in edges])
+            visit_counts = visit_counts + virtual_loss_counts
+            mean_action_values = np.where(
+                visit_counts > 0, (total_action_values - self.virtual_loss * virtual_loss_counts) / np.maximum(
+                    visit_counts, 1.), 0.)
+            total_visit_count += virtual_loss_counts.sum()
+        U = self.c_puct * action_probs * (math.sqrt(total_visit_count) / (1. + visit_counts))
+        R = 0.8 * rewards
+        return mean_action_values + U + R
+
+    def get_action_probs(self, node):
+        visit_counts = np.array([edge.visit_count for edge in node.edges])
+        if self.temperature != 0:
+            visit_counts = np.power(visit_counts, 1. / self.temperature)
+        total_visit_count = visit_counts.sum()
+        if total_visit_count == 0:
+            # search falls back to uniform probabilities
+            action_probs = np.zeros(len(visit_counts))
+        else:
+            action_probs = visit_counts / total_visit_count
+        return action_probs
+
+    def get_child_node(self, node, edge):
+        if edge.node is None:
+            next_state, info = self.env.simulate_board(node.state, edge.action)
+            if self.transpositions is None:
+                edge.node = self.new_node(next_state, edge, node, info["state_hash"])
+            else:
+                key = (info["state_hash"], next_state.turn)
+                edge.node = self.transpositions.get(key)
+                if edge.node is None:
+                    edge.node = self.new_node(next_state, edge, node, info["state_hash"])
+                    self.transpositions[key] = edge.node
+        return edge.node
+
+    def new_node(self, state, parent_edge, parent_node, state_hash):
+        if self.max_nodes and self.num_nodes >= self.prune_num_nodes:
+            self.prune()
+        self.num_nodes += 1
+        if self.node_pool:
+            node = self.node_pool.pop()
+            node.__init__(state, parent_edge, parent_node, state_hash)
+            return node
+        return Node(state, parent_edge, parent_node, state_hash)
+
+    def get_tree_nodes(self, root_node):
+        # every node reachable from root_node, a node shared by transpositions once
+        nodes = set()
+        stack = [root_node]
+        while stack:
+            node = stack.pop()
+            if node in nodes:
+                continue
+            nodes.add(node)
+            stack.extend(edge.node for edge in node.edges if edge.node is not None)
+        return nodes
+
+    def prune(self):
+        """Cuts the least visited edges off the tree until about prune_ratio * max_nodes nodes are left.
+
+        The edges of the selection path and of the paths waiting for a batch or thread evaluation are kept. A cut
+        edge keeps its statistics, its child is made again if a selection goes through it later.
+        """
+        protected_edges = set(self.selected_edges)
+        for paths in self.pending_leaves.values():
+            for _, selected_edges in paths:
+                protected_edges.update(selected_edges)
+        nodes = self.get_tree_nodes(self.root_node)
+        edges = [edge for node in nodes for edge in node.edges
+                 if edge.node is not None and edge not in protected_edges]
+        edges.sort(key=lambda edge: edge.visit_count)
+        for edge in edges[:max(0, len(nodes) - int(self.max_nodes * self.prune_ratio))]:
+            edge.node = None
+        self.sweep(nodes)
+
+    def sweep(self, old_nodes):
+        """Releases the nodes of old_nodes which the root can't reach anymore into node_pool."""
+        nodes = self.get_tree_nodes(self.root_node)
+        # a node released by an earlier prune has no state
+        released_nodes = [node for node in old_nodes if node.state is not None and node not in nodes]
+        for node in released_nodes:
+            node.state = None
+            node.planes = None
+            node.edges = []
+            node.parent_edge = None
+            node.parent_node = None
+        # a node kept through a transposition can have lost the parent it was made under, the reward walk of
+        # expand follows the parent links, so they are moved to a parent the root still reaches
+        parents = {}
+        for node in nodes:
+            for edge in node.edges:
+                if edge.node is not None:
+                    parents.setdefault(edge.node, (node, edge))
+        for node in nodes:
+            if node is not self.root_node and (node.parent_node not in nodes or node.parent_edge.node is not node):
+                node.parent_node, node.parent_edge = parents[node]
+        self.num_nodes = len(nodes)
+        self.prune_num_nodes = max(self.max_nodes, self.num_nodes + int(self.max_nodes * (1 - self.prune_ratio)))
+        # the pool and the tree together stay within the budget
+        num_pooled = max(0, min(len(released_nodes), self.max_nodes - self.num_nodes - len(self.node_pool)))
+        self.node_pool.extend(released_nodes[:num_pooled])
+        if self.transpositions is not None:
+            self.rebuild_transpositions()
+        self.log("MCTS released %d nodes, %d nodes left" % (len(released_nodes), self.num_nodes))
+
+    def is_on_path(self, node):
+        return node is self.current_node or node in self.selected_nodes
+
+    def rebuild_transpositions(self):
+        # only the positions under the new root stay in the table
+        self.transpositions = {}
+        nodes = [self.root_node]
+        while nodes:
+            node = nodes.pop()
+            key = (node.state_hash, node.state.turn)
+            if key in self.transpositions:
+                continue
+            self.transpositions[key] = node
+            nodes.extend(edge.node for edge in node.edges if edge.node is not None)
+
     def get_action_idx(self, action_probs):
         return self.model.get_action_idx(action_probs, self.temperature)
 
@@ -155,14 +495,16 @@ class Mcts(object):
         if self.current_node is self.root_node:
             edge_idx = self.choice_no_visited_edge_idx()
         if edge_idx is None:
-            select_scores = np.array(
-                [edge.get_select_score(self.current_node.edges, self.c_puct) for edge in self.current_node.edges])
+            select_scores = self.get_select_scores(self.current_node)
 
             edge_idx = self.choice_edge_idx(select_scores)
 
             self.log(select_scores)
 
         is_repeat = self.env.check_repeat(self.current_node.edges[edge_idx].action, self.action_history)
+        if not is_repeat and self.transpositions is not None:
+            # a transposition back to a position of this path repeats it
+            is_repeat = self.is_on_path(self.get_child_node(self.current_node, self.current_node.edges[edge_idx]))
 
         if is_repeat:
             if len(self.current_node.edges) == 1:
@@ -176,11 +518,16 @@ class Mcts(object):
                     tmp_edge_idx = self.choice_edge_idx(select_scores)
                 edge_idx = tmp_edge_idx
 
+        child_node = self.get_child_node(self.current_node, self.current_node.edges[edge_idx])
+        if self.transpositions is not None and self.is_on_path(child_node):
+            return 2
+
+        self.selected_nodes.append(self.current_node)
         self.selected_edges.append(self.current_node.edges[edge_idx])
         self.action_history.append(self.current_node.edges[edge_idx].action)
-        self.state_history.append(self.current_node.edges[edge_idx].node.state)
+        self.history_planes.push(self.get_node_planes(child_node))
 
-        self.current_node = self.current_node.edges[edge_idx].node
+        self.current_node = child_node
         # self.env.print_env(state=self.current_node.state)
 
         return False
@@ -188,29 +535,36 @@ class Mcts(object):
     def expand_and_evaluate(self):
         self.log("Expand and Evaluate!")
 
-        if self.env.is_over(self.current_node.state):
+        if self.env.is_over(self.current_node.state, self.current_node.state_hash):
             self.log("MCTS Game Over")
 
             return self.loser_reward
 
         # todo :pass액션 추가 ( 둘다 pass할경우 점수계산으로
 
-        action_probs, state_value = self.model.inference(
-            common.convert_state_history_to_model_input(self.state_history[-(self.num_state_history + 1):],
-                                                        self.num_state_history))
+        action_probs, state_value = self.model.inference(self.history_planes.get_model_input())
 
         self.log("MCTS Value inference", state_value)
+        return self.expand(self.current_node, action_probs, state_value)
+
+    def get_node_planes(self, node):
+        # a board is converted once, the nodes of a selection path were converted when they were evaluated
+        if node.planes is None:
+            node.planes = self.env.get_planes(node.state).astype(np.int8)
+        return node.planes
+
+    def expand(self, node, action_probs, state_value):
         # todo : <<빅장>> 혹은 외통수(장군)등 기능 구현?
         # todo: 비긴 상태 구현해서 적용하기(더 디테일하게)
 
-        legal_actions = self.env.get_all_actions(self.current_node.state)
+        legal_actions = self.env.get_all_actions(node.state, node.state_hash)
 
         if not legal_actions:
             return self.loser_reward
 
         legal_action_probs = self.model.filter_action_probs(action_probs, legal_actions, self.env)
 
-        if self.root_node is self.current_node:
+        if self.root_node is node:
             # add noise to prior probabilities
             # if (legal_action_probs == 0).all():
             #     noise_probs = legal_action_probs
@@ -222,16 +576,17 @@ class Mcts(object):
 
             legal_action_probs = legal_action_probs / legal_action_probs.sum()
 
-        self.current_node.edges = []
+        node.edges = []
+        node.total_visit_count = .0
         best_reward = 0
+        rewards = self.env.get_action_rewards(node.state, legal_actions)
         for i, action_prob in enumerate(legal_action_probs):
-            next_state, info = self.env.simulate(self.current_node.state, legal_actions[i])
-            if info["reward"] > best_reward:
-                best_reward = info["reward"]
-            self.current_node.edges.append(
-                Edge(self.current_node, action_prob, next_state, legal_actions[i], info["reward"]))
+            if rewards[i] > best_reward:
+                best_reward = rewards[i]
+            node.edges.append(
+                Edge(action_prob, legal_actions[i], rewards[i]))
         # update reward
-        tmp_node = self.current_node
+        tmp_node = node
         i = 0
         while tmp_node.parent_node is not None:
             if i > 0:
@@ -257,6 +612,8 @@ class Mcts(object):
     def backup(self, state_value):
         self.log("MCTS Backup")
 
+        for node in self.selected_nodes:
+            node.total_visit_count += 1.
         self.selected_edges.reverse()
 
         for i, edge in enumerate(self.selected_edges):
@@ -272,8 +629,13 @@ class Mcts(object):
 
     def init_state(self):
         self.current_node = self.root_node
-        self.state_history = [self.current_node.state]
+        if self.root_history_node is not self.root_node:
+            self.root_history.clear()
+            self.root_history.push(self.get_node_planes(self.root_node))
+            self.root_history_node = self.root_node
+        self.history_planes.copy_from(self.root_history)
         self.selected_edges = []
+        self.selected_nodes = []
         self.action_history = []
 
     def print_tree(self):
@@ -287,7 +649,8 @@ class Mcts(object):
         child_nodes = []
         for node in nodes:
             for edge in node.edges:
-                child_nodes.append(edge.node)
+                if edge.node is not None:
+                    child_nodes.append(edge.node)
         self.log("%d row: %d nodes" % (row_idx, len(nodes)))
         if row_idx > 996:
             self.log("more...")
@@ -297,16 +660,28 @@ class Mcts(object):
 
 
 class Node(object):
-    def __init__(self, state, parent_edge=None, parent_node=None):
+    # the state is a Board, 90 bytes of squares, so slots keep the per node overhead small
+    __slots__ = ('state', 'state_hash', 'edges', 'parent_edge', 'parent_node', 'best_reward', 'total_visit_count',
+                 'planes')
+
+    def __init__(self, state, parent_edge=None, parent_node=None, state_hash=None):
         self.state = state
+        self.state_hash = state_hash
         self.edges = []
+        # sum of the visit counts of the edges, kept by backup so a select doesn't walk the edges for it
+        self.total_visit_count = .0
         self.parent_edge = parent_edge
         self.parent_node = parent_node
         self.best_reward = .0
+        # int8 planes of the state for the model input history, made on the first selection of the node
+        self.planes = None
 
 
 class Edge(object):
-    def __init__(self, parent_node, action_prob, state, action, reward):
+    __slots__ = ('visit_count', 'total_action_value', 'mean_action_value', 'action_prob', 'action', 'reward', 'node',
+                 'virtual_loss_count')
+
+    def __init__(self, action_prob, action, reward):
         # N
         self.visit_count = .0
         # W
@@ -314,10 +689,13 @@ class Edge(object):
         # Q
         self.mean_action_value = .0
         # P
-        self.action_prob = action_prob
+        self.action_prob = float(action_prob)
         self.action = action
         self.reward = reward
-        self.node = Node(state, self, parent_node)
+        # the child node, made the first time a selection goes through this edge (Mcts.get_child_node)
+        self.node = None
+        # leaves below this edge waiting for a batch evaluation
+        self.virtual_loss_count = 0
 
     def add_noise(self, noice_prob):
 
@@ -327,32 +705,3 @@ class Edge(object):
         self.visit_count += 1.
         self.total_action_value += state_value
         self.mean_action_value = self.total_action_value / self.visit_count
-
-    def get_select_score(self, edges, c_puct):
-        # todo : what is b?? other acitions visit count?? check!!
-
-        total_other_edge_visit_count = .0
-        for edge in edges:
-            total_other_edge_visit_count += edge.visit_count
-        U = c_puct * self.action_prob * (math.sqrt(total_other_edge_visit_count) / (1. + self.visit_count))
-        R = 0.8 * self.reward
-        result = self.mean_action_value + U + R
-        # result = self.reward
-
-        return result
-
-    def get_action_probs(self, edges, temperature):
-        # todo : what is b?? other acitions visit count?? check!!
-
-        total_other_edge_visit_count = .0
-        for edge in edges:
-            if temperature == 0:
-                total_other_edge_visit_count += edge.visit_count
-            else:
-                total_other_edge_visit_count += (pow(edge.visit_count, 1. / temperature))
-        if temperature == 0:
-            result = self.visit_count / total_other_edge_visit_count
-        else:
-            result = pow(self.visit_count, 1. / temperature) / total_other_edge_visit_count
-
-        return result
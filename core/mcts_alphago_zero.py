@@ -13,10 +13,13 @@ class Mcts(object):
         self.env = env
         self.model = model
         self.max_simulation = max_simulation
-        self.root_node = Node(state)
+        # nodes keep the native engine state, planes are only built for the model input
+        board = env.get_board(state)
+        self.root_node = Node(board, state_hash=env.get_state_hash(board))
         self.selected_edges = []
+        self.selected_nodes = []
         self.action_history = []
-        self.state_history = [state]
+        self.state_history = [board]
         self.current_node = self.root_node
         self.temperature = .0
         self.winner_reward = winner_reward
@@ -47,14 +50,13 @@ class Mcts(object):
                 self.expand_and_evaluate()
 
             for action_idx in action_idx_list:
-                self.root_node = self.root_node.edges[action_idx].node
+                self.root_node = self.get_child_node(self.root_node, self.root_node.edges[action_idx])
 
         for i in range(self.max_simulation):
             self.log("mcts simulate %d " % i)
             self.simulate()
 
-        action_probs = np.array(
-            [edge.get_action_probs(self.root_node.edges, self.temperature) for edge in self.root_node.edges])
+        action_probs = self.get_action_probs(self.root_node)
         self.log("MCTS root edges")
 
         for i, edge in enumerate(self.root_node.edges):
@@ -105,14 +107,39 @@ class Mcts(object):
         return edge_idx
 
 
+    def get_select_scores(self, node):
+        edges = node.edges
+        visit_counts = np.array([edge.visit_count for edge in edges])
+        action_probs = np.array([edge.action_prob for edge in edges])
+        mean_action_values = np.array([edge.mean_action_value for edge in edges])
+        U = self.c_puct * action_probs * (math.sqrt(node.total_visit_count) / (1. + visit_counts))
+        return mean_action_values + U
+
+    def get_action_probs(self, node):
+        visit_counts = np.array([edge.visit_count for edge in node.edges])
+        if self.temperature != 0:
+            visit_counts = np.power(visit_counts, 1. / self.temperature)
+        total_visit_count = visit_counts.sum()
+        if total_visit_count == 0:
+            # search falls back to uniform probabilities
+            action_probs = np.zeros(len(visit_counts))
+        else:
+            action_probs = visit_counts / total_visit_count
+        return action_probs
+
+    def get_child_node(self, node, edge):
+        if edge.node is None:
+            next_state, info = self.env.simulate_board(node.state, edge.action)
+            edge.node = Node(next_state, edge, state_hash=info["state_hash"])
+        return edge.node
+
     def get_action_idx(self, action_probs):
         return self.model.get_action_idx(action_probs, self.temperature)
 
     def select(self):
         if not self.current_node.edges:
             return True
-        select_scores = np.array(
-            [edge.get_select_score(self.current_node.edges, self.c_puct) for edge in self.current_node.edges])
+        select_scores = self.get_select_scores(self.current_node)
 
         edge_idx = self.choice_edge_idx(select_scores)
 
@@ -132,11 +159,13 @@ class Mcts(object):
                     tmp_edge_idx = self.choice_edge_idx(select_scores)
                 edge_idx = tmp_edge_idx
 
+        self.selected_nodes.append(self.current_node)
         self.selected_edges.append(self.current_node.edges[edge_idx])
         self.action_history.append(self.current_node.edges[edge_idx].action)
-        self.state_history.append(self.current_node.edges[edge_idx].node.state)
+        child_node = self.get_child_node(self.current_node, self.current_node.edges[edge_idx])
+        self.state_history.append(child_node.state)
 
-        self.current_node = self.current_node.edges[edge_idx].node
+        self.current_node = child_node
         # self.env.print_env(state=self.current_node.state)
 
         return False
@@ -144,22 +173,22 @@ class Mcts(object):
     def expand_and_evaluate(self):
         self.log("Expand and Evaluate!")
 
-        if self.env.is_over(self.current_node.state):
+        if self.env.is_over(self.current_node.state, self.current_node.state_hash):
             self.log("MCTS Game Over")
 
             return self.loser_reward
 
         # todo :pass액션 추가 ( 둘다 pass할경우 점수계산으로
 
+        state_history = [self.env.get_planes(board) for board in self.state_history[-(self.num_state_history + 1):]]
         action_probs, state_value = self.model.inference(
-            common.convert_state_history_to_model_input(self.state_history[-(self.num_state_history + 1):],
-                                                        self.num_state_history))
+            common.convert_state_history_to_model_input(state_history, self.num_state_history))
 
         self.log("MCTS Value inference", state_value)
         # todo : <<빅장>> 혹은 외통수(장군)등 기능 구현?
         # todo: 비긴 상태 구현해서 적용하기(더 디테일하게)
 
-        legal_actions = self.env.get_all_actions(self.current_node.state)
+        legal_actions = self.env.get_all_actions(self.current_node.state, self.current_node.state_hash)
 
         if not legal_actions:
             return self.loser_reward
@@ -179,10 +208,11 @@ class Mcts(object):
             legal_action_probs = legal_action_probs / legal_action_probs.sum()
 
         self.current_node.edges = []
+        self.current_node.total_visit_count = .0
+        rewards = self.env.get_action_rewards(self.current_node.state, legal_actions)
         for i, action_prob in enumerate(legal_action_probs):
-            next_state, info = self.env.simulate(self.current_node.state, legal_actions[i])
-
-            self.current_node.edges.append(Edge(action_prob, next_state, legal_actions[i], info["reward"]))
+            self.current_node.edges.append(
+                Edge(action_prob, legal_actions[i], rewards[i]))
 
         reward = -self.current_node.parent_edge.reward if self.current_node.parent_edge else 0
 
@@ -194,6 +224,8 @@ class Mcts(object):
     def backup(self, state_value):
         self.log("MCTS Backup")
 
+        for node in self.selected_nodes:
+            node.total_visit_count += 1.
         self.selected_edges.reverse()
 
         for i, edge in enumerate(self.selected_edges):
@@ -211,6 +243,7 @@ class Mcts(object):
         self.current_node = self.root_node
         self.state_history = [self.current_node.state]
         self.selected_edges = []
+        self.selected_nodes = []
         self.action_history = []
 
     def print_tree(self):
@@ -224,7 +257,8 @@ class Mcts(object):
         child_nodes = []
         for node in nodes:
             for edge in node.edges:
-                child_nodes.append(edge.node)
+                if edge.node is not None:
+                    child_nodes.append(edge.node)
         self.log("%d row: %d nodes" % (row_idx, len(nodes)))
         if row_idx > 996:
             self.log("more...")
@@ -234,14 +268,21 @@ class Mcts(object):
 
 
 class Node(object):
-    def __init__(self, state, parent_edge=None):
+    __slots__ = ('state', 'state_hash', 'edges', 'parent_edge', 'total_visit_count')
+
+    def __init__(self, state, parent_edge=None, state_hash=None):
         self.state = state
+        self.state_hash = state_hash
         self.edges = []
+        # sum of the visit counts of the edges, kept by backup so a select doesn't walk the edges for it
+        self.total_visit_count = .0
         self.parent_edge = parent_edge
 
 
 class Edge(object):
-    def __init__(self, action_prob, state, action, reward):
+    __slots__ = ('visit_count', 'total_action_value', 'mean_action_value', 'action_prob', 'action', 'reward', 'node')
+
+    def __init__(self, action_prob, action, reward):
         # N
         self.visit_count = .0
         # W
@@ -249,10 +290,11 @@ class Edge(object):
         # Q
         self.mean_action_value = .0
         # P
-        self.action_prob = action_prob
+        self.action_prob = float(action_prob)
         self.action = action
         self.reward = reward
-        self.node = Node(state, self)
+        # the child node, made the first time a selection goes through this edge (Mcts.get_child_node)
+        self.node = None
 
     def add_noise(self, noice_prob):
 
@@ -262,30 +304,3 @@ class Edge(object):
         self.visit_count += 1.
         self.total_action_value += state_value
         self.mean_action_value = self.total_action_value / self.visit_count
-
-    def get_select_score(self, edges, c_puct):
-        # todo : what is b?? other acitions visit count?? check!!
-
-        total_other_edge_visit_count = .0
-        for edge in edges:
-            total_other_edge_visit_count += edge.visit_count
-        U = c_puct * self.action_prob * (math.sqrt(total_other_edge_visit_count) / (1. + self.visit_count))
-        result = self.mean_action_value + U
-
-        return result
-
-    def get_action_probs(self, edges, temperature):
-        # todo : what is b?? other acitions visit count?? check!!
-
-        total_other_edge_visit_count = .0
-        for edge in edges:
-            if temperature == 0:
-                total_other_edge_visit_count += edge.visit_count
-            else:
-                total_other_edge_visit_count += (pow(edge.visit_count, 1. / temperature))
-        if temperature == 0:
-            result = self.visit_count / total_other_edge_visit_count
-        else:
-            result = pow(self.visit_count, 1. / temperature) / total_other_edge_visit_count
-
-        return result
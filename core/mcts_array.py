@@ -0,0 +1,388 @@
+# coding=utf8
+import numpy as np
+from util import common
+
+
+class Arena(object):
+    """Growable struct-of-arrays storage of a search tree.
+
+    Every expanded node owns a contiguous slice [edge_start, edge_start + num_edges) of the edge arrays, which hold
+    N (visit_count), W (total_action_value), Q (mean_action_value), P (action_prob), R (reward), the action and the
+    child node of each edge. Nodes are ids into the node arrays, their Board and hash are kept in lists. The child of
+    an edge is -1 until a selection first goes through the edge (Mcts.get_child).
+    """
+
+    def __init__(self, edge_capacity=4096, node_capacity=4096):
+        self.num_edges = 0
+        self.visit_count = np.zeros(edge_capacity)
+        self.total_action_value = np.zeros(edge_capacity)
+        self.mean_action_value = np.zeros(edge_capacity)
+        self.action_prob = np.zeros(edge_capacity)
+        self.reward = np.zeros(edge_capacity)
+        self.action = np.zeros(edge_capacity, dtype=np.int64)
+        self.child = np.zeros(edge_capacity, dtype=np.int64)
+
+        self.num_nodes = 0
+        self.edge_start = np.zeros(node_capacity, dtype=np.int64)
+        self.node_num_edges = np.zeros(node_capacity, dtype=np.int64)
+        self.parent_edge = np.zeros(node_capacity, dtype=np.int64)
+        self.parent_node = np.zeros(node_capacity, dtype=np.int64)
+        self.states = []
+        self.state_hashes = []
+
+    def add_node(self, state, state_hash, parent_node=-1, parent_edge=-1):
+        if self.num_nodes == len(self.edge_start):
+            self.grow_nodes(self.num_nodes + 1)
+        node = self.num_nodes
+        self.num_nodes += 1
+        self.edge_start[node] = 0
+        self.node_num_edges[node] = 0
+        self.parent_node[node] = parent_node
+        self.parent_edge[node] = parent_edge
+        self.states.append(state)
+        self.state_hashes.append(state_hash)
+        return node
+
+    def add_edges(self, node, action_probs, actions, rewards):
+        """Expands node with one edge per action, the child nodes are added later by add_child."""
+        num_edges = len(actions)
+        if self.num_edges + num_edges > len(self.visit_count):
+            self.grow_edges(self.num_edges + num_edges)
+        start = self.num_edges
+        end = start + num_edges
+        self.num_edges = end
+        self.visit_count[start:end] = 0
+        self.total_action_value[start:end] = 0
+        self.mean_action_value[start:end] = 0
+        self.action_prob[start:end] = action_probs
+        self.reward[start:end] = rewards
+        self.action[start:end] = actions
+        self.child[start:end] = -1
+        self.edge_start[node] = start
+        self.node_num_edges[node] = num_edges
+
+    def add_child(self, node, edge, state, state_hash):
+        child = self.add_node(state, state_hash, node, edge)
+        self.child[edge] = child
+        return child
+
+    def get_edges(self, node):
+        start = self.edge_start[node]
+        return start, start + self.node_num_edges[node]
+
+    def grow_edges(self, required):
+        capacity = max(len(self.visit_count) * 2, required)
+        for name in ('visit_count', 'total_action_value', 'mean_action_value', 'action_prob', 'reward', 'action',
+                     'child'):
+            setattr(self, name, self.grow_array(getattr(self, name), capacity, self.num_edges))
+
+    def grow_nodes(self, required):
+        capacity = max(len(self.edge_start) * 2, required)
+        for name in ('edge_start', 'node_num_edges', 'parent_edge', 'parent_node'):
+            setattr(self, name, self.grow_array(getattr(self, name), capacity, self.num_nodes))
+
+    @staticmethod
+    def grow_array(array, capacity, size):
+        new_array = np.zeros(capacity, dtype=array.dtype)
+        new_array[:size] = array[:size]
+        return new_array
+
+    def copy_subtree(self, root):
+        """New arena holding only the subtree of root, root becomes node 0."""
+        arena = Arena(max(self.num_edges, 1), max(self.num_nodes, 1))
+        new_root = arena.add_node(self.states[root], self.state_hashes[root])
+        nodes = [(root, new_root)]
+        while nodes:
+            node, new_node = nodes.pop()
+            start, end = self.get_edges(node)
+            if start == end:
+                continue
+            arena.add_edges(new_node, self.action_prob[start:end], self.action[start:end], self.reward[start:end])
+            new_start, new_end = arena.get_edges(new_node)
+            arena.visit_count[new_start:new_end] = self.visit_count[start:end]
+            arena.total_action_value[new_start:new_end] = self.total_action_value[start:end]
+            arena.mean_action_value[new_start:new_end] = self.mean_action_value[start:end]
+            for i in np.flatnonzero(self.child[start:end] >= 0):
+                child = self.child[start + i]
+                new_child = arena.add_child(new_node, new_start + i, self.states[child], self.state_hashes[child])
+                nodes.append((child, new_child))
+        return arena
+
+
+class Mcts(object):
+    """core.mcts.Mcts on an Arena, selection, backup and the root policy are array operations.
+
+    The search behaves like core.mcts.Mcts and takes the same arguments. The tree is compacted to the subtree of the
+    new root when search moves the root.
+    """
+
+    def __init__(self, state, env, model, max_simulation=500, winner_reward=1., loser_reward=-1., c_puct=0.01,
+                 init_root_edges=False, num_state_history=7, print_mcts_search=True):
+        self.env = env
+        self.model = model
+        self.max_simulation = max_simulation
+        self.arena = Arena()
+        board = env.get_board(state)
+        self.root_node = self.arena.add_node(board, env.get_state_hash(board))
+        self.selected_edges = []
+        self.action_history = []
+        self.state_history = [board]
+        self.current_node = self.root_node
+        self.temperature = .0
+        self.winner_reward = winner_reward
+        self.loser_reward = loser_reward
+        self.c_puct = c_puct
+        self.num_state_history = num_state_history
+        self.print_mcts_search = print_mcts_search
+        if init_root_edges:
+            self.expand_and_evaluate()
+
+    def log(self, *args):
+        if self.print_mcts_search:
+            print(args)
+
+    def search(self, temperature=.0, action_idx_list=[]):
+        self.temperature = temperature
+        arena = self.arena
+        if len(action_idx_list) > 0:
+            for action_idx in action_idx_list:
+                if arena.node_num_edges[self.root_node] == 0:
+                    self.expand_and_evaluate()
+                start, _ = arena.get_edges(self.root_node)
+                self.root_node = self.get_child(self.root_node, start + action_idx)
+                self.init_state()
+            self.arena = arena = arena.copy_subtree(self.root_node)
+            self.root_node = 0
+            self.init_state()
+
+        start, end = arena.get_edges(self.root_node)
+        if end > start:
+            noise_probs = np.random.dirichlet([1] * (end - start), 1)[0]
+            arena.action_prob[start:end] = (0.75 * arena.action_prob[start:end]) + (0.25 * noise_probs)
+
+        for i in range(self.max_simulation):
+            self.log("mcts simulate %d " % i)
+
+            self.simulate()
+
+        start, end = arena.get_edges(self.root_node)
+        visit_counts = arena.visit_count[start:end]
+        if self.temperature != 0:
+            visit_counts = np.power(visit_counts, 1. / self.temperature)
+        total_visit_count = visit_counts.sum()
+        if total_visit_count > 0:
+            action_probs = visit_counts / total_visit_count
+        else:
+            action_probs = np.zeros(end - start)
+        self.log("MCTS root edges")
+
+        for i in range(end - start):
+            self.log("%d edge score! N: %d, P: %f, total_value: %f, mean_value: %f -> %s" % (
+                i, arena.visit_count[start + i], arena.action_prob[start + i], arena.total_action_value[start + i],
+                arena.mean_action_value[start + i], str(arena.action[start + i])))
+
+        if (action_probs == 0).all():
+            action_probs = np.array([1. / len(action_probs)] * len(action_probs))
+        else:
+            action_probs = action_probs / action_probs.sum()
+
+        self.log("action probs!")
+        self.log(action_probs)
+
+        return action_probs
+
+    def simulate(self):
+        is_leaf_node = False
+        i = 0
+        while not is_leaf_node:
+            self.log("mcts select %d" % i)
+
+            is_leaf_node = self.select()
+
+            if is_leaf_node == 2:
+                self.backup(-1)
+                return
+            i += 1
+
+        state_value = self.expand_and_evaluate()
+
+        self.backup(state_value)
+
+    def choice_edge_idx(self, select_scores):
+        if (select_scores == 0).all():
+            edge_idx = np.random.choice(len(select_scores), 1)[0]
+        else:
+            arg_max_list = np.argwhere(select_scores == np.amax(select_scores)).flatten()
+            if len(arg_max_list) > 1:
+                edge_idx = np.random.choice(arg_max_list, 1)[0]
+            else:
+                edge_idx = select_scores.argmax()
+
+        return edge_idx
+
+    def choice_no_visited_edge_idx(self, visit_counts, skip_idx=None):
+        no_visited_idx_list = np.flatnonzero(visit_counts == 0)
+
+        if len(no_visited_idx_list) == 0:
+            return None
+        if skip_idx is None:
+            edge_idx = np.random.choice(no_visited_idx_list, 1)[0]
+        else:
+            if len(no_visited_idx_list) == 1:
+                return None
+            edge_idx = skip_idx
+            while edge_idx == skip_idx:
+                edge_idx = np.random.choice(no_visited_idx_list, 1)[0]
+
+        return edge_idx
+
+    def get_select_scores(self, start, end):
+        arena = self.arena
+        visit_counts = arena.visit_count[start:end]
+        U = self.c_puct * arena.action_prob[start:end] * (np.sqrt(visit_counts.sum()) / (1. + visit_counts))
+        R = 0.8 * arena.reward[start:end]
+        return arena.mean_action_value[start:end] + U + R
+
+    def get_child(self, node, edge):
+        arena = self.arena
+        if arena.child[edge] < 0:
+            next_state, info = self.env.simulate_board(arena.states[node], arena.action[edge])
+            return arena.add_child(node, edge, next_state, info["state_hash"])
+        return arena.child[edge]
+
+    def get_action_idx(self, action_probs):
+        return self.model.get_action_idx(action_probs, self.temperature)
+
+    def select(self):
+        arena = self.arena
+        start, end = arena.get_edges(self.current_node)
+        if start == end:
+            return True
+        is_root = self.current_node == self.root_node
+        select_scores = None
+        edge_idx = None
+        if is_root:
+            edge_idx = self.choice_no_visited_edge_idx(arena.visit_count[start:end])
+        if edge_idx is None:
+            select_scores = self.get_select_scores(start, end)
+            edge_idx = self.choice_edge_idx(select_scores)
+
+            self.log(select_scores)
+
+        is_repeat = self.env.check_repeat(arena.action[start + edge_idx], self.action_history)
+
+        if is_repeat:
+            if end - start == 1:
+                return 2
+            else:
+                tmp_edge_idx = None
+                if is_root:
+                    tmp_edge_idx = self.choice_no_visited_edge_idx(arena.visit_count[start:end], edge_idx)
+                if tmp_edge_idx is None:
+                    if select_scores is None:
+                        select_scores = self.get_select_scores(start, end)
+                    # the best of the other edges
+                    other_idx_list = np.delete(np.arange(end - start), edge_idx)
+                    tmp_edge_idx = other_idx_list[self.choice_edge_idx(select_scores[other_idx_list])]
+                edge_idx = tmp_edge_idx
+
+        edge = start + edge_idx
+        child = self.get_child(self.current_node, edge)
+        self.selected_edges.append(edge)
+        self.action_history.append(arena.action[edge])
+        self.state_history.append(arena.states[child])
+
+        self.current_node = child
+
+        return False
+
+    def expand_and_evaluate(self):
+        self.log("Expand and Evaluate!")
+        arena = self.arena
+        node = self.current_node
+        state = arena.states[node]
+        state_hash = arena.state_hashes[node]
+
+        if self.env.is_over(state, state_hash):
+            self.log("MCTS Game Over")
+
+            return self.loser_reward
+
+        state_history = [self.env.get_planes(board) for board in self.state_history[-(self.num_state_history + 1):]]
+        action_probs, state_value = self.model.inference(
+            common.convert_state_history_to_model_input(state_history, self.num_state_history))
+
+        self.log("MCTS Value inference", state_value)
+
+        legal_actions = self.env.get_all_actions(state, state_hash)
+
+        if not legal_actions:
+            return self.loser_reward
+
+        legal_action_probs = self.model.filter_action_probs(action_probs, legal_actions, self.env)
+
+        if node == self.root_node:
+            # add noise to prior probabilities
+            noise_probs = np.random.dirichlet([1] * len(legal_action_probs), 1)[0]
+
+            legal_action_probs = ((1 - 0.25) * legal_action_probs + (noise_probs * 0.25))
+
+            legal_action_probs = legal_action_probs / legal_action_probs.sum()
+
+        rewards = self.env.get_action_rewards(state, legal_actions)
+        arena.add_edges(node, legal_action_probs, legal_actions, rewards)
+
+        # update reward, the same as core.mcts.Mcts (best_reward of a node stays 0)
+        best_reward = max(0, max(rewards))
+        tmp_node = node
+        i = 0
+        while arena.parent_node[tmp_node] >= 0:
+            if i > 0:
+                start, end = arena.get_edges(tmp_node)
+                best_reward = max(0, arena.reward[start:end].max())
+            if best_reward == 0:
+                break
+            arena.reward[arena.parent_edge[tmp_node]] -= best_reward
+            tmp_node = arena.parent_node[tmp_node]
+            i += 1
+
+        self.log("MCTS state value + reward", state_value)
+        return state_value
+
+    def backup(self, state_value):
+        self.log("MCTS Backup")
+        arena = self.arena
+        if self.selected_edges:
+            # the last selected edge gets -state_value, the signs alternate up to the root
+            edges = np.array(self.selected_edges[::-1])
+            values = np.where(np.arange(len(edges)) % 2 == 0, -state_value, state_value)
+            arena.visit_count[edges] += 1.
+            arena.total_action_value[edges] += values
+            arena.mean_action_value[edges] = arena.total_action_value[edges] / arena.visit_count[edges]
+
+        self.init_state()
+
+    def init_state(self):
+        self.current_node = self.root_node
+        self.state_history = [self.arena.states[self.root_node]]
+        self.selected_edges = []
+        self.action_history = []
+
+    def print_tree(self):
+        self.log("========== mcts tree trace ==========")
+
+        nodes = [self.root_node]
+        row_idx = 0
+        while nodes and row_idx <= 996:
+            self.log("%d row: %d nodes" % (row_idx, len(nodes)))
+            child_nodes = []
+            for node in nodes:
+                start, end = self.arena.get_edges(node)
+                children = self.arena.child[start:end]
+                child_nodes.extend(children[children >= 0])
+            nodes = child_nodes
+            row_idx += 1
+        if nodes:
+            self.log("more...")
+
+        self.log("=====================================")
@@ -0,0 +1,104 @@
+# coding=utf8
+import multiprocessing
+import traceback
+import numpy as np
+from core.mcts import Mcts
+
+
+class RootParallelMcts(object):
+    """Root parallel search over num_processes worker processes.
+
+    Every worker builds its own model with build_model() and keeps its own Mcts from the same root, seeded with its
+    own seed so the dirichlet noise on the root edges differs between the trees. search sends the moves played since
+    the last search to every worker, sums the visit counts of the root edges of all trees and returns the policy of
+    the summed counts, like Mcts.search.
+    The workers are always forked, a spawned worker would import the calling script again and the scripts run their
+    game at module level. They start before the caller builds any tensorflow session, the parent process needs no
+    model.
+    """
+
+    def __init__(self, state, env, build_model, num_processes, seed=None, **mcts_options):
+        self.num_processes = num_processes
+        self.temperature = .0
+        # simulations of all workers in the last search
+        self.num_simulations = 0
+        if seed is None:
+            seed = np.random.randint(2 ** 31 - num_processes)
+        context = multiprocessing.get_context("fork")
+        self.connections = []
+        self.processes = []
+        for i in range(num_processes):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=run_worker,
+                                      args=(worker_connection, state, env, build_model, seed + i, mcts_options))
+            process.daemon = True
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def search(self, temperature=.0, action_idx_list=[], time_budget_ms=None):
+        self.temperature = temperature
+        for connection in self.connections:
+            connection.send(("search", temperature, list(action_idx_list), time_budget_ms))
+        # every reply is read before an error is raised, so none is left for the next search
+        results = [connection.recv() for connection in self.connections]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        visit_counts = None
+        self.num_simulations = 0
+        for worker_visit_counts, worker_num_simulations in results:
+            self.num_simulations += worker_num_simulations
+            if visit_counts is None:
+                visit_counts = worker_visit_counts
+            else:
+                visit_counts = visit_counts + worker_visit_counts
+
+        if temperature != 0:
+            visit_counts = np.power(visit_counts, 1. / temperature)
+        if (visit_counts == 0).all():
+            return np.array([1. / len(visit_counts)] * len(visit_counts))
+        return visit_counts / visit_counts.sum()
+
+    def get_action_idx(self, action_probs):
+        if self.temperature == 0:
+            arg_max_list = np.argwhere(action_probs == np.amax(action_probs)).flatten()
+            action_idx = np.random.choice(arg_max_list, 1)[0]
+        else:
+            action_idx = np.random.choice(len(action_probs), 1, p=action_probs)[0]
+        print("choice action idx %d" % action_idx)
+        return action_idx
+
+    def print_tree(self):
+        # the trees of the workers, one after another
+        for connection in self.connections:
+            connection.send(("print_tree",))
+            connection.recv()
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+        for process in self.processes:
+            process.join()
+
+
+def run_worker(connection, state, env, build_model, seed, mcts_options):
+    np.random.seed(seed)
+    model = build_model()
+    mcts = Mcts(state, env, model, **mcts_options)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        try:
+            if message[0] == "search":
+                _, temperature, action_idx_list, time_budget_ms = message
+                mcts.search(temperature, action_idx_list, time_budget_ms)
+                connection.send((np.array([edge.visit_count for edge in mcts.root_node.edges]), mcts.num_simulations))
+            elif message[0] == "print_tree":
+                mcts.print_tree()
+                connection.send(True)
+        except Exception as e:
+            traceback.print_exc()
+            connection.send(e)
+    connection.close()
@@ -1,4 +1,5 @@
 from math import sqrt, log
+import time
 import numpy as np
 
 
@@ -10,11 +11,17 @@ class MctsUctReward(object):
         self.root_node = None
         self.current_node = None
         self.c_puct = c_puct
+        # iterations completed by the last search
+        self.num_simulations = 0
 
-    def search(self, state, turn):
+    def search(self, state, turn, time_budget_ms=None):
+        # with time_budget_ms, iterates until the budget is spent instead of num_iteration times, at least once so
+        # the root has a child to return
+        deadline = None if time_budget_ms is None else time.time() + time_budget_ms / 1000.
         self.root_node = Node(self.env, state, turn)
         self.current_node = self.root_node
-        for i in range(self.num_iteration):
+        i = 0
+        while (i < self.num_iteration) if deadline is None else (i == 0 or time.time() < deadline):
             print("iteration %d" % i)
             selected = True
             while selected:
@@ -27,6 +34,11 @@ class MctsUctReward(object):
 
             if red_rewards is not False:
                 self.update(red_rewards, blue_rewards)
+            i += 1
+
+        self.num_simulations = i
+        if deadline is not None:
+            print("%d iterations in %d ms" % (i, time_budget_ms))
 
         for i, child_node in enumerate(self.root_node.child_nodes):
             print("child %d : visit - %f, wins - %f, turn - %s" % (
@@ -52,9 +64,10 @@ class MctsUctReward(object):
         legal_actions = self.current_node.untried_actions
         action_idx = np.random.choice(len(legal_actions), 1)[0]
         action = legal_actions[action_idx]
-        next_state, info = self.env.simulate(self.current_node.state, action)
+        next_state, info = self.env.simulate(self.current_node.state, action,
+                                             state_hash=self.current_node.state_hash)
         next_node = Node(self.env, next_state, MctsUctReward.get_opponent_turn(self.current_node.turn),
-                         self.current_node, action)
+                         self.current_node, action, info["state_hash"])
         self.current_node.child_nodes.append(next_node)
         del self.current_node.untried_actions[action_idx]
         self.current_node = next_node
@@ -69,13 +82,14 @@ class MctsUctReward(object):
             if not legal_actions:
                 break
             action = legal_actions[np.random.choice(len(legal_actions), 1)[0]]
-            next_state, info = self.env.simulate(self.current_node.state, action)
+            next_state, info = self.env.simulate(self.current_node.state, action,
+                                                 state_hash=self.current_node.state_hash)
             if self.current_node.turn == 'r':
                 red_rewards += info["reward"]
             else:
                 blue_rewards += info["reward"]
             next_node = Node(self.env, next_state, MctsUctReward.get_opponent_turn(self.current_node.turn),
-                             self.current_node, action)
+                             self.current_node, action, info["state_hash"])
             self.current_node.child_nodes.append(next_node)
             self.current_node = next_node
             is_game_over = info['is_game_over']
@@ -109,7 +123,7 @@ class MctsUctReward(object):
 
 
 class Node:
-    def __init__(self, env, state, turn, parent_node=None, action=None):
+    def __init__(self, env, state, turn, parent_node=None, action=None, state_hash=None):
         self.action = action
         self.turn = turn
         self.parent_node = parent_node
@@ -117,7 +131,8 @@ class Node:
         self.wins = 0.
         self.visits = 0.
         self.state = state
-        self.untried_actions = env.get_all_actions(state)
+        self.state_hash = env.get_state_hash(state) if state_hash is None else state_hash
+        self.untried_actions = env.get_all_actions(state, self.state_hash)
 
     def select(self, c_puct):
         # s = sorted(self.child_nodes, key=lambda c: c.wins / c.visits + sqrt(2 * log(self.visits) / c.visits))[-1]
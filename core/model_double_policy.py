@@ -1,7 +1,10 @@
 # coding=utf8
 """reference source: https://github.com/tensorflow/models/tree/master/official/resnet """
+import threading
 import tensorflow as tf
 import numpy as np
+from util.cache import LruCache
+from util.cache import get_array_key
 
 _BATCH_NORM_DECAY = 0.997
 _BATCH_NORM_EPSILON = 1e-5
@@ -9,7 +12,7 @@ _BATCH_NORM_EPSILON = 1e-5
 
 class Model(object):
     def __init__(self, sess, input_shape=[10, 9, 17], num_layers=20, num_classes=10 * 9, weight_decay=0.01,
-                 momentum=0.9, use_cache=False, conf=None):
+                 momentum=0.9, use_cache=False, conf=None, cache_capacity=20000):
         self.sess = sess
         self.is_training = tf.placeholder(tf.bool, shape=(), name="is_training")
         self.inputs = None
@@ -28,20 +31,57 @@ class Model(object):
         self.momentum = momentum
         self.use_cache = use_cache
         self.build_model(input_shape, num_layers, num_classes, weight_decay)
-        self.inference_cache = {}
+        # model input digest -> outputs, shared by every mcts searching with this model. it holds outputs of the
+        # current weights, train clears it and a restore of the weights has to call clear_cache
+        self.inference_cache = LruCache(cache_capacity) if use_cache else None
+        self.cache_lock = threading.Lock()
 
     def inference(self, state):
-        # cache_key = str(state)
-        # if self.use_cache and cache_key in self.inference_cache:
-        #     return self.inference_cache[cache_key][0], self.inference_cache[cache_key][1]
+        if self.inference_cache is None:
+            return self.run_inference(state)
+        cache_key = get_array_key(state)
+        with self.cache_lock:
+            outputs = self.inference_cache.get(cache_key)
+        if outputs is None:
+            outputs = self.run_inference(state)
+            with self.cache_lock:
+                self.inference_cache.put(cache_key, outputs)
+        return outputs
+
+    def run_inference(self, state):
         input_state = state[np.newaxis, :]
         policy, value = self.sess.run([self.policy_network, self.value_network],
                                       feed_dict={self.inputs: input_state, self.is_training: False})
-        # if self.use_cache:
-        #     self.inference_cache[cache_key] = [policy[0], value[0]]
         return policy[0], value[0]
 
+    def inference_batch(self, states):
+        # one sess.run for a [batch, 10, 9, 17] stack of model inputs, the cached inputs are left out of it
+        if self.inference_cache is None:
+            return self.sess.run([self.policy_network, self.value_network],
+                                 feed_dict={self.inputs: states, self.is_training: False})
+        cache_keys = [get_array_key(state) for state in states]
+        with self.cache_lock:
+            outputs_list = [self.inference_cache.get(cache_key) for cache_key in cache_keys]
+        missing = [i for i, outputs in enumerate(outputs_list) if outputs is None]
+        if missing:
+            batch_outputs = self.sess.run([self.policy_network, self.value_network],
+                                          feed_dict={self.inputs: states[missing], self.is_training: False})
+            with self.cache_lock:
+                for j, i in enumerate(missing):
+                    outputs_list[i] = tuple(outputs[j] for outputs in batch_outputs)
+                    self.inference_cache.put(cache_keys[i], outputs_list[i])
+        return [np.array([outputs[k] for outputs in outputs_list]) for k in range(2)]
+
+    def clear_cache(self):
+        if self.inference_cache is not None:
+            with self.cache_lock:
+                self.inference_cache.clear()
+
+    def get_cache_stats(self):
+        return self.inference_cache.get_stats() if self.inference_cache is not None else None
+
     def train(self, state, policy, value, num_samples):
+        self.clear_cache()
         return self.sess.run([self.train_op, self.cost, self.merged],
                              feed_dict={self.inputs: state, self.is_training: True, self.policy_label: policy,
                                         self.value_label: value, self.num_samples: num_samples})
@@ -168,12 +208,8 @@ class Model(object):
         return inputs
 
     def filter_action_probs(self, action_probs, legal_actions, env):
-        legal_action_probs = []
-        for legal_action in legal_actions:
-            legal_action = env.encode_action(legal_action)
-            legal_action_probs.append(action_probs[legal_action[0]] + action_probs[legal_action[1] + 90])
-
-        legal_action_probs = np.array(legal_action_probs)
+        from_squares, to_squares = env.encode_action(np.array(legal_actions))
+        legal_action_probs = action_probs[from_squares] + action_probs[to_squares + 90]
         if (legal_action_probs == 0).all():
             legal_action_probs = np.array([1. / len(legal_action_probs)] * len(legal_action_probs))
         else:
@@ -1,20 +1,35 @@
 from util import common
+from util.history_planes import HistoryPlanes
 import sys, traceback
 from core.mcts import Mcts
 from core.mcts_reward import Mcts as Mcts_reward
 from core.mcts_with_reward import Mcts as MctsWithReward
+from core.mcts_array import Mcts as MctsArray
+
+
+def check_mcts_options(MctsClass, mcts_options):
+    # the search options of common.get_mcts_options are only implemented in core.mcts.Mcts
+    if not mcts_options:
+        return {}
+    if MctsClass is not Mcts:
+        raise Exception("mcts options %s need core.mcts.Mcts" % str(sorted(mcts_options.keys())))
+    return mcts_options
 
 
 def self_play(env, model, max_simulation, max_step, c_puct, exploration_step, reuse_mcts=True, print_mcts_tree=False,
-              num_state_history=7, print_mcts_search=True, use_reward_mcts=False, begin_temperature=1):
+              num_state_history=7, print_mcts_search=True, use_reward_mcts=False, begin_temperature=1,
+              use_array_mcts=False, mcts_options=None):
     state = env.reset()
     MctsClass = Mcts
     if use_reward_mcts:
         MctsClass = Mcts_reward
+    elif use_array_mcts:
+        MctsClass = MctsArray
+    mcts_options = check_mcts_options(MctsClass, mcts_options)
 
     mcts = MctsClass(state, env, model, max_simulation=max_simulation, c_puct=c_puct,
                      num_state_history=num_state_history,
-                     print_mcts_search=print_mcts_search)
+                     print_mcts_search=print_mcts_search, **mcts_options)
     state_history = [state.tolist()]
     mcts_history = []
     temperature = begin_temperature
@@ -28,6 +43,11 @@ def self_play(env, model, max_simulation, max_step, c_puct, exploration_step, re
             common.log("temperature down")
             temperature = 0
         actions = env.get_all_actions()
+        if not actions:
+            # no legal action left (only with use_legal_actions), the current turn loses
+            info = env.get_no_action_info()
+            state_history.pop()
+            break
         if not reuse_mcts:
             action_probs = mcts.search(temperature)
         else:
@@ -64,7 +84,8 @@ def self_play(env, model, max_simulation, max_step, c_puct, exploration_step, re
             continue
 
         if not reuse_mcts:
-            mcts = MctsClass(state, env, model, max_simulation=max_simulation, c_puct=c_puct, init_root_edges=True)
+            mcts = MctsClass(state, env, model, max_simulation=max_simulation, c_puct=c_puct, init_root_edges=True,
+                             **mcts_options)
         mcts_history.append(env.convert_action_probs_to_policy_probs(actions, action_probs))
 
         old_action_idx = action_idx
@@ -81,13 +102,16 @@ def self_play_only_net(env, model, max_step):
     temperature = 0
     info = None
     step = 0
-    state_history = [state]
+    history_planes = HistoryPlanes()
+    history_planes.push(state)
     while step <= max_step:
         # for step in range(max_step):
         common.log("step: %d" % step)
         actions = env.get_all_actions()
-        converted_state = common.convert_state_history_to_model_input(state_history[-8:])
-        policy, policy2, value = model.inference(converted_state)
+        if not actions:
+            info = env.get_no_action_info()
+            break
+        policy, policy2, value = model.inference(history_planes.get_model_input())
         print("value %f" % value)
         print("policy", policy)
         print("policy2", policy2)
@@ -123,7 +147,7 @@ def self_play_only_net(env, model, max_step):
             traceback.print_exc(file=sys.stdout)
             continue
 
-        state_history.append(state)
+        history_planes.push(state)
 
         step += 1
         if done:
@@ -152,6 +176,11 @@ def self_play_mcts_with_reward(env, model, max_simulation, max_step, c_puct, exp
             common.log("temperature down")
             temperature = 0
         actions = env.get_all_actions()
+        if not actions:
+            # no legal action left (only with use_legal_actions), the current turn loses
+            info = env.get_no_action_info()
+            state_history.pop()
+            break
         if not reuse_mcts:
             action_probs = mcts.search(temperature)
         else:
@@ -203,12 +232,16 @@ def self_play_mcts_with_reward(env, model, max_simulation, max_step, c_puct, exp
 
 
 def eval_play(env, blue_model, red_model, max_simulation, max_step, c_puct, reuse_mcts=True, print_mcts_tree=False,
-              num_state_history=7, print_mcts_search=False):
+              num_state_history=7, print_mcts_search=False, use_array_mcts=False, mcts_options=None):
     state = env.reset()
-    blue_mcts = Mcts(state, env, blue_model, max_simulation=max_simulation, c_puct=c_puct,
-                     num_state_history=num_state_history, print_mcts_search=print_mcts_search, init_root_edges=True)
-    red_mcts = Mcts(state, env, red_model, max_simulation=max_simulation, c_puct=c_puct,
-                    num_state_history=num_state_history, print_mcts_search=print_mcts_search, init_root_edges=True)
+    MctsClass = MctsArray if use_array_mcts else Mcts
+    mcts_options = check_mcts_options(MctsClass, mcts_options)
+    blue_mcts = MctsClass(state, env, blue_model, max_simulation=max_simulation, c_puct=c_puct,
+                          num_state_history=num_state_history, print_mcts_search=print_mcts_search,
+                          init_root_edges=True, **mcts_options)
+    red_mcts = MctsClass(state, env, red_model, max_simulation=max_simulation, c_puct=c_puct,
+                         num_state_history=num_state_history, print_mcts_search=print_mcts_search,
+                         init_root_edges=True, **mcts_options)
     temperature = 0
     info = None
     step = 0
@@ -218,6 +251,9 @@ def eval_play(env, blue_model, red_model, max_simulation, max_step, c_puct, reus
         # for step in range(max_step):
         common.log("step: %d" % step)
         actions = env.get_all_actions()
+        if not actions:
+            info = env.get_no_action_info()
+            break
         if not reuse_mcts:
             action_probs = mcts.search(temperature)
         else:
@@ -257,12 +293,12 @@ def eval_play(env, blue_model, red_model, max_simulation, max_step, c_puct, reus
         action_idx_history.append(action_idx)
 
         if not reuse_mcts:
-            blue_mcts = Mcts(state, env, blue_model, max_simulation=max_simulation, c_puct=c_puct,
-                             num_state_history=num_state_history, print_mcts_search=print_mcts_search,
-                             init_root_edges=True)
-            red_mcts = Mcts(state, env, red_model, max_simulation=max_simulation, c_puct=c_puct,
-                            num_state_history=num_state_history, print_mcts_search=print_mcts_search,
-                            init_root_edges=True)
+            blue_mcts = MctsClass(state, env, blue_model, max_simulation=max_simulation, c_puct=c_puct,
+                                  num_state_history=num_state_history, print_mcts_search=print_mcts_search,
+                                  init_root_edges=True, **mcts_options)
+            red_mcts = MctsClass(state, env, red_model, max_simulation=max_simulation, c_puct=c_puct,
+                                 num_state_history=num_state_history, print_mcts_search=print_mcts_search,
+                                 init_root_edges=True, **mcts_options)
 
         if step % 2 == 0:
             mcts = red_mcts
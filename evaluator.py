@@ -15,7 +15,8 @@ common.make_dirs(FLAGS.save_dir)
 
 env = Game.make("KoreanChess-v1",
                 {"use_check": False, "limit_step": FLAGS.max_step, "print_mcts_history": FLAGS.print_mcts_history,
-                 "use_color_print": FLAGS.use_color_print, "use_cache": FLAGS.use_cache})
+                 "use_color_print": FLAGS.use_color_print, "use_cache": FLAGS.use_cache,
+                 "cache_capacity": FLAGS.cache_capacity, "use_legal_actions": FLAGS.use_legal_actions})
 
 config = tf.ConfigProto()
 config.gpu_options.allow_growth = True
@@ -23,14 +24,16 @@ new_model_g = tf.Graph()
 with new_model_g.as_default():
     new_model_sess = tf.Session(config=config)
     new_model = Model(new_model_sess, weight_decay=FLAGS.weight_decay, momentum=FLAGS.momentum,
-                      num_layers=FLAGS.num_model_layers, use_cache=FLAGS.use_cache)
+                      num_layers=FLAGS.num_model_layers, use_cache=FLAGS.use_cache,
+                      cache_capacity=FLAGS.cache_capacity)
     new_model_sess.run(tf.global_variables_initializer())
 
 best_model_g = tf.Graph()
 with best_model_g.as_default():
     best_model_sess = tf.Session(config=config)
     best_model = Model(best_model_sess, weight_decay=FLAGS.weight_decay, momentum=FLAGS.momentum,
-                       num_layers=FLAGS.num_model_layers, use_cache=FLAGS.use_cache)
+                       num_layers=FLAGS.num_model_layers, use_cache=FLAGS.use_cache,
+                       cache_capacity=FLAGS.cache_capacity)
     best_model_sess.run(tf.global_variables_initializer())
 
 saver = tf.train.Saver()
@@ -47,17 +50,23 @@ while True:
         if not common.restore_model(FLAGS.save_dir, new_model_file, saver, new_model_sess):
             log("failed to restore new model checkpoint : %s" % new_model_file)
             continue
+        best_model.clear_cache()
+        new_model.clear_cache()
         game_results = {"new_model": 0, "best_model": 0, "d": 0}
         for episode in common.num_eval_games:
             log("eval-play episode %d" % episode)
             if episode % 2 == 0:
                 print("blue : new model, red : best model")
                 info = play.eval_play(env, new_model, best_model, FLAGS.max_simulation, FLAGS.max_step, FLAGS.c_puct,
-                                      FLAGS.reuse_mcts, FLAGS.print_mcts_tree, FLAGS.num_state_history)
+                                      FLAGS.reuse_mcts, FLAGS.print_mcts_tree, FLAGS.num_state_history,
+                                      use_array_mcts=FLAGS.use_array_mcts,
+                                      mcts_options=common.get_mcts_options(FLAGS))
             else:
                 print("blue : best model, red : new model")
                 info = play.eval_play(env, best_model, new_model, FLAGS.max_simulation, FLAGS.max_step, FLAGS.c_puct,
-                                      FLAGS.reuse_mcts, FLAGS.print_mcts_tree, FLAGS.num_state_history)
+                                      FLAGS.reuse_mcts, FLAGS.print_mcts_tree, FLAGS.num_state_history,
+                                      use_array_mcts=FLAGS.use_array_mcts,
+                                      mcts_options=common.get_mcts_options(FLAGS))
 
             if info["winner"]:
                 who = {"r": "new_model", "b": "best_model"}
@@ -69,6 +78,9 @@ while True:
                 game_results["d"] += 1
             common.log("New model wins : %d, Best model wins : %d, Draws : %d" % (
                 game_results["new_model"], game_results["best_model"], game_results["d"]))
+            if FLAGS.use_cache:
+                common.log("inference cache : new model %s, best model %s" % (new_model.get_cache_stats(),
+                                                                              best_model.get_cache_stats()))
         total_wins = game_results["new_model"] + game_results["best_model"]
         if game_results["new_model"] > total_wins * 0.55:
             # change best_model
@@ -3,9 +3,10 @@ from __future__ import division
 from __future__ import print_function
 
 from game.korean_chess_v1 import KoreanChessV1
+from game.korean_chess_batch import BatchedKoreanChess
 
 class Game(object):
-    env_class_map = {'KoreanChess-v1': KoreanChessV1}
+    env_class_map = {'KoreanChess-v1': KoreanChessV1, 'BatchedKoreanChess-v1': BatchedKoreanChess}
 
     @staticmethod
     def make(game_id, properties=None):
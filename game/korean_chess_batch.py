@@ -0,0 +1,233 @@
+# coding=utf8
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import random
+
+from game import korean_chess_constant as c
+from game import korean_chess_util as u
+from game.korean_chess_board import Board
+from game.korean_chess_board import ZOBRIST_PIECES
+from game.korean_chess_board import ZOBRIST_RED_TURN
+from game.korean_chess_v1 import KoreanChessV1
+import numpy as np
+
+NUM_SQUARES = 90
+NUM_ACTIONS = NUM_SQUARES * NUM_SQUARES
+
+# REWARD_ARRAY[abs(piece)], 0 for an empty square
+REWARD_ARRAY = np.array([0] + [c.REWARD_LIST[piece] for piece in range(c.SOLDIER, c.KING + 1)], dtype=np.float64)
+# ZOBRIST_ARRAY[piece + c.KING, square], the empty square row is zeroed so captures of nothing xor nothing
+ZOBRIST_ARRAY = np.array(ZOBRIST_PIECES, dtype=np.uint64)
+ZOBRIST_ARRAY[c.KING] = 0
+# pieces besides cannons which keep a game from being a draw (see korean_chess_util.is_draw)
+NOT_DRAW_PIECES = [c.SOLDIER, c.SANG, c.HORSE, c.CAR]
+
+
+class BatchedKoreanChess:
+    """num_envs KoreanChess-v1 games stepped together.
+
+    squares is a (num_envs, 90) int8 array with the same piece codes as Board.squares, turns holds 1 for BLUE and
+    -1 for RED. reset, step, the action masks, the game over flags and the state planes work on every game in one
+    call, so a single process can play many games and send their states to the network as one batch.
+    Per game move generation still runs the korean_chess_piece generators on a Board of the row.
+    """
+
+    def __init__(self, properties):
+        self.properties = properties
+        self.num_envs = 1
+        self.limit_step = 200
+        self.limit_repeat = 4
+        self.limit_action_history = None
+        self.use_check = True
+        self.validate_action = True
+        self.use_legal_actions = False
+        if properties and "num_envs" in properties:
+            self.num_envs = properties["num_envs"]
+        self.squares = np.zeros((self.num_envs, NUM_SQUARES), dtype=np.int8)
+        self.turns = np.ones(self.num_envs, dtype=np.int8)
+        self.hashes = np.zeros(self.num_envs, dtype=np.uint64)
+        self.steps = np.zeros(self.num_envs, dtype=np.int32)
+        self.dones = np.zeros(self.num_envs, dtype=bool)
+        self.action_histories = [[] for _ in range(self.num_envs)]
+
+    def reset(self, env_indices=None):
+        """Resets every game, or the games of env_indices, and returns the planes of every game."""
+        if self.properties:
+            if "limit_step" in self.properties:
+                self.limit_step = self.properties["limit_step"]
+            if "limit_repeat" in self.properties:
+                self.limit_repeat = self.properties["limit_repeat"]
+            if "use_check" in self.properties:
+                self.use_check = self.properties["use_check"]
+            if "validate_action" in self.properties:
+                self.validate_action = self.properties["validate_action"]
+            if "use_legal_actions" in self.properties:
+                self.use_legal_actions = self.properties["use_legal_actions"]
+        self.limit_action_history = self.limit_repeat + (self.limit_repeat - 2)
+
+        if env_indices is None:
+            env_indices = range(self.num_envs)
+        for i in env_indices:
+            if self.properties and "init_state" in self.properties:
+                board, _ = u.encode_state(self.properties["init_state"])
+            else:
+                if not self.properties or (
+                                "position_type" not in self.properties or self.properties['position_type'] == 'random'):
+                    position_type_list = [random.randint(0, 3), random.randint(0, 3)]
+                else:
+                    position_type_list = self.properties['position_type']
+                board = Board.from_state(KoreanChessV1.build_position_state(position_type_list), c.BLUE)
+            self.squares[i] = board.squares
+            self.turns[i] = c.SIDE_SIGN[board.turn]
+            self.hashes[i] = board.hash
+            self.steps[i] = 0
+            self.dones[i] = False
+            self.action_histories[i] = []
+
+        return self.get_planes()
+
+    def get_board(self, env_idx):
+        turn = c.BLUE if self.turns[env_idx] == 1 else c.RED
+        return Board(self.squares[env_idx].tolist(), turn, int(self.hashes[env_idx]))
+
+    def get_all_actions(self, env_idx):
+        board = self.get_board(env_idx)
+        if self.use_legal_actions:
+            return u.get_legal_actions(board, board.turn)
+        else:
+            return u.get_all_actions(board, board.turn)
+
+    def get_action_masks(self, env_indices=None):
+        """(num_envs, 8100) bool masks of the actions of every game, games which are over have no actions."""
+        masks = np.zeros((self.num_envs, NUM_ACTIONS), dtype=bool)
+        if env_indices is None:
+            env_indices = range(self.num_envs)
+        for i in env_indices:
+            if not self.dones[i]:
+                masks[i, self.get_all_actions(i)] = True
+        return masks
+
+    def get_planes(self):
+        """(num_envs, 3, 10, 9) planes of every game, the same planes as KoreanChessV1 returns."""
+        squares = self.squares.reshape(self.num_envs, 10, 9)
+        planes = np.empty((self.num_envs, 3, 10, 9), dtype=np.float64)
+        np.maximum(squares, 0, out=planes[:, 0])
+        np.maximum(-squares, 0, out=planes[:, 1])
+        planes[:, 2] = self.turns[:, np.newaxis, np.newaxis]
+        return planes
+
+    def get_state_hashes(self):
+        return self.hashes.copy()
+
+    def is_over(self):
+        """Whether a king of every game has been captured."""
+        return ~((self.squares == c.KING).any(axis=1) & (self.squares == -c.KING).any(axis=1))
+
+    def get_scores(self):
+        """(blue scores, red scores) of every game, the pieces left on the board as KoreanChessV1 counts them."""
+        rewards = REWARD_ARRAY[np.abs(self.squares)]
+        kings = np.abs(self.squares) == c.KING
+        blue_scores = np.where((self.squares > 0) & ~kings, rewards, 0).sum(axis=1)
+        red_scores = np.where((self.squares < 0) & ~kings, rewards, 0).sum(axis=1) + 1.5
+        return blue_scores, red_scores
+
+    def step(self, actions):
+        """Plays actions[i] in game i, a negative action skips the game (games which are over are skipped).
+
+        Returns (planes, rewards, dones, infos) for every game like KoreanChessV1.step. A game whose action repeats
+        the same moves too often is left as it is and gets False as info. An invalid action raises before any game
+        is changed.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        moving = (actions >= 0) & ~self.dones
+        infos = [None] * self.num_envs
+        is_checks = np.zeros(self.num_envs, dtype=bool)
+        for i in np.flatnonzero(moving):
+            action = int(actions[i])
+            if self.validate_action or self.use_check:
+                board = self.get_board(i)
+                turn = board.turn
+                next_turn = c.RED if turn == c.BLUE else c.BLUE
+            if self.validate_action:
+                if not u.validate_action(action, board, turn, next_turn, self.use_check):
+                    raise Exception("Invalid action of game %d :%s" % (i, action))
+                if self.check_repeat(i, action):
+                    moving[i] = False
+                    infos[i] = False
+                    continue
+            if self.use_check:
+                is_checks[i] = u.is_check(board, action, turn)
+
+        # every action is validated before any game changes
+        env_indices = np.flatnonzero(moving)
+        for i in env_indices:
+            action_history = self.action_histories[i]
+            action_history.append(int(actions[i]))
+            if len(action_history) > self.limit_action_history:
+                self.action_histories[i] = action_history[-self.limit_action_history:]
+
+        from_squares, to_squares = np.divmod(actions[env_indices], NUM_SQUARES)
+        pieces = self.squares[env_indices, from_squares]
+        captured = self.squares[env_indices, to_squares]
+        self.squares[env_indices, to_squares] = pieces
+        self.squares[env_indices, from_squares] = 0
+        self.hashes[env_indices] ^= ZOBRIST_ARRAY[pieces + c.KING, from_squares] ^ \
+            ZOBRIST_ARRAY[pieces + c.KING, to_squares] ^ ZOBRIST_ARRAY[captured + c.KING, to_squares] ^ \
+            np.uint64(ZOBRIST_RED_TURN)
+        self.turns[env_indices] *= -1
+        self.steps[env_indices] += 1
+
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        captured_rewards = REWARD_ARRAY[np.abs(captured)]
+        king_captured = captured_rewards == c.REWARD_LIST[c.KING]
+        rewards[env_indices] = np.where(king_captured, 1, captured_rewards / (c.REWARD_LIST[c.KING] * 2))
+
+        # a checkmate ends the game like a king capture
+        is_checkmates = np.zeros(self.num_envs, dtype=bool)
+        for i in env_indices[is_checks[env_indices]]:
+            # the side which has just moved
+            turn = c.BLUE if self.turns[i] == -1 else c.RED
+            is_checkmates[i] = u.is_checkmate(self.get_board(i), turn)
+        rewards[is_checkmates] = 1
+
+        is_draws = np.zeros(self.num_envs, dtype=bool)
+        over_limit_steps = self.steps >= self.limit_step
+        not_draws = np.isin(np.abs(self.squares), NOT_DRAW_PIECES).any(axis=1)
+        for i in env_indices[~not_draws[env_indices]]:
+            is_draws[i] = u.is_draw(self.get_board(i))
+
+        self.dones[env_indices[king_captured]] = True
+        self.dones[is_checkmates] = True
+        self.dones[env_indices] |= is_draws[env_indices] | over_limit_steps[env_indices]
+
+        blue_scores, red_scores = self.get_scores()
+        for i in env_indices:
+            info = {"is_check": bool(is_checks[i]), "over_limit_step": bool(over_limit_steps[i]),
+                    "is_draw": bool(is_draws[i])}
+            if info["over_limit_step"] or info["is_draw"]:
+                if blue_scores[i] == 72 and red_scores[i] == 73.5:
+                    winner = None
+                elif blue_scores[i] > red_scores[i]:
+                    winner = c.BLUE
+                elif blue_scores[i] < red_scores[i]:
+                    winner = c.RED
+                else:
+                    winner = None
+                info["score_diff"] = abs(blue_scores[i] - red_scores[i])
+            else:
+                # the side which has just moved
+                winner = c.BLUE if self.turns[i] == -1 else c.RED
+            info["winner"] = winner
+            infos[i] = info
+
+        return self.get_planes(), rewards, self.dones.copy(), infos
+
+    def check_repeat(self, env_idx, action):
+        if self.limit_repeat < 2:
+            return False
+        action_history = self.action_histories[env_idx]
+        if self.limit_action_history > len(action_history):
+            return False
+        return u.check_repeat(action, action_history)
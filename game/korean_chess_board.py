@@ -0,0 +1,136 @@
+# coding=utf8
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from array import array
+from game import korean_chess_constant as c
+import numpy as np
+import random
+
+WIDTH = 9
+HEIGHT = 10
+NUM_SQUARES = WIDTH * HEIGHT
+
+# 64-bit zobrist keys, ZOBRIST_PIECES[piece + c.KING][square]. the seed is fixed so every process hashes alike.
+ZOBRIST_SEED = 20171019
+_zobrist_random = random.Random(ZOBRIST_SEED)
+ZOBRIST_PIECES = [[_zobrist_random.getrandbits(64) for _ in range(NUM_SQUARES)] for _ in range(c.KING * 2 + 1)]
+ZOBRIST_RED_TURN = _zobrist_random.getrandbits(64)
+del _zobrist_random
+
+
+class Board(object):
+    """Compact janggi board.
+
+    squares is a 90-element int8 array in row-major order (index = y * 9 + x).
+    Each square holds a signed piece code: BLUE pieces are positive, RED pieces are negative and
+    the absolute value is the piece number (c.SOLDIER ... c.KING). 0 is an empty square.
+    hash is the zobrist hash of the pieces and the side to move, kept up to date by move_piece/unmake_move.
+    """
+    __slots__ = ('squares', 'turn', 'hash')
+
+    def __init__(self, squares=None, turn=c.BLUE, hash_value=None):
+        if squares is None:
+            self.squares = array('b', [0] * NUM_SQUARES)
+        else:
+            self.squares = array('b', squares)
+        self.turn = turn
+        self.hash = compute_hash(self.squares, turn) if hash_value is None else hash_value
+
+    def copy(self):
+        return Board(self.squares, self.turn, self.hash)
+
+    def get_piece(self, x, y):
+        return self.squares[y * WIDTH + x]
+
+    def make_move(self, action):
+        from_square, to_square = divmod(action, NUM_SQUARES)
+        return self.move_piece(from_square, to_square)
+
+    def move_piece(self, from_square, to_square):
+        """Moves a piece in place and passes the turn. Returns the undo token for unmake_move."""
+        squares = self.squares
+        piece = squares[from_square]
+        captured = squares[to_square]
+        squares[to_square] = piece
+        squares[from_square] = 0
+        self.turn = c.RED if self.turn == c.BLUE else c.BLUE
+        self.hash ^= get_move_hash(piece, from_square, to_square, captured)
+        return from_square, to_square, captured
+
+    def unmake_move(self, undo):
+        from_square, to_square, captured = undo
+        squares = self.squares
+        piece = squares[to_square]
+        squares[from_square] = piece
+        squares[to_square] = captured
+        self.turn = c.RED if self.turn == c.BLUE else c.BLUE
+        self.hash ^= get_move_hash(piece, from_square, to_square, captured)
+
+    def to_state(self):
+        state = []
+        for y in range(HEIGHT):
+            line = []
+            for piece in self.squares[y * WIDTH:(y + 1) * WIDTH]:
+                if piece == 0:
+                    line.append(0)
+                elif piece > 0:
+                    line.append(c.BLUE + str(piece))
+                else:
+                    line.append(c.RED + str(-piece))
+            state.append(line)
+        return state
+
+    def to_planes(self, turn=None):
+        if turn is None:
+            turn = self.turn
+        squares = np.frombuffer(self.squares, dtype=np.int8).reshape(HEIGHT, WIDTH)
+        planes = np.empty((3, HEIGHT, WIDTH), dtype=np.float64)
+        np.maximum(squares, 0, out=planes[0])
+        np.maximum(-squares, 0, out=planes[1])
+        planes[2] = 1 if turn == c.BLUE else -1
+        return planes
+
+    @staticmethod
+    def from_state(state, turn=c.BLUE):
+        squares = []
+        for line in state:
+            for piece in line:
+                if piece == 0:
+                    squares.append(0)
+                else:
+                    squares.append(c.SIDE_SIGN[piece[0]] * int(piece[1]))
+        return Board(squares, turn)
+
+    @staticmethod
+    def from_planes(planes):
+        planes = np.asarray(planes)
+        squares = (planes[0] - planes[1]).astype(np.int8).ravel()
+        turn = c.BLUE if planes[2][0][0] == 1 else c.RED
+        return Board(squares.tolist(), turn)
+
+
+def compute_hash(squares, turn):
+    hash_value = ZOBRIST_RED_TURN if turn == c.RED else 0
+    for square, piece in enumerate(squares):
+        if piece != 0:
+            hash_value ^= ZOBRIST_PIECES[piece + c.KING][square]
+    return hash_value
+
+
+def get_move_hash(piece, from_square, to_square, captured):
+    """Xor delta of moving piece from from_square to to_square (capturing captured) and passing the turn."""
+    keys = ZOBRIST_PIECES[piece + c.KING]
+    hash_delta = keys[from_square] ^ keys[to_square] ^ ZOBRIST_RED_TURN
+    if captured != 0:
+        hash_delta ^= ZOBRIST_PIECES[captured + c.KING][to_square]
+    return hash_delta
+
+
+def get_square(x, y):
+    return y * WIDTH + x
+
+
+def get_xy(square):
+    return square % WIDTH, square // WIDTH
@@ -34,6 +34,9 @@ R_CR = 'r6'
 BLUE = 'b'
 RED = 'r'
 
+# sign of the piece codes on a board (see korean_chess_board.Board)
+SIDE_SIGN = {BLUE: 1, RED: -1}
+
 LEFT_WALL = 0
 RIGHT_WALL = 8
 TOP_WALL = 0
@@ -51,32 +54,45 @@ REWARD_LIST = {
 
 
 def get_score(state, turn):
+    side = SIDE_SIGN[turn]
     score = 0
-    for line in state:
-        for piece_num in line:
-            if piece_num == 0 or piece_num[0] != turn or int(piece_num[1]) == KING:
-                continue
-            score += REWARD_LIST[int(piece_num[1])]
+    for piece in state.squares:
+        if piece * side <= 0 or piece * side == KING:
+            continue
+        score += REWARD_LIST[piece * side]
     if turn == RED:
         score += 1.5
     return score
 
 
+def build_action(from_square, to_square):
+    # actions are packed into an int, squares are y * 9 + x
+    return from_square * 90 + to_square
+
+
+def get_side(piece):
+    return 1 if piece > 0 else -1
+
+
 def is_empty_space(state, x, y):
-    return state[y][x] == 0
+    return state[y * 9 + x] == 0
 
 
 def is_our_side(state, x, y, side):
-    return state[y][x] != 0 and state[y][x][0] == side
+    return state[y * 9 + x] * side > 0
 
 
 def is_enemy(state, x, y, side):
-    return state[y][x] != 0 and state[y][x][0] != side
+    return state[y * 9 + x] * side < 0
 
 
 def is_cannon(state, x, y):
-    return state[y][x] != 0 and int(state[y][x][1]) == CANNON
+    return abs(state[y * 9 + x]) == CANNON
 
 
 def is_piece(state, x, y):
-    return state[y][x] != 0
+    return state[y * 9 + x] != 0
+
+
+def is_inside(x, y):
+    return LEFT_WALL <= x <= RIGHT_WALL and TOP_WALL <= y <= BOTTOM_WALL
@@ -0,0 +1,408 @@
+# coding=utf8
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+from game import korean_chess_constant as c
+from game import korean_chess_util as u
+from game.korean_chess_board import Board
+from game.korean_chess_v1 import KoreanChessV1
+
+POSITION_TYPE_NAMES = ["masangmasang", "masangsangma", "sangmasangma", "sangmamasang"]
+
+# midgame and endgame positions, (state, turn)
+STORED_POSITIONS = {
+    "midgame_1": ([
+        [0, c.R_SG, c.R_HS, c.R_GD, c.R_KG, c.R_GD, c.R_HS, c.R_SG, c.B_SG],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, c.R_CN, 0],
+        [c.R_SD, 0, 0, 0, c.R_SD, 0, 0, 0, c.R_SD],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, c.R_CR, c.R_SD, 0, 0, 0, 0, 0, c.B_SD],
+        [0, c.B_SD, 0, 0, 0, c.B_SD, c.B_SD, 0, 0],
+        [c.B_CR, c.B_CN, 0, 0, c.B_KG, 0, 0, c.B_CN, c.B_HS],
+        [0, 0, 0, c.B_HS, 0, 0, 0, 0, 0],
+        [0, 0, 0, c.B_GD, 0, c.B_GD, c.B_SG, 0, c.B_CR],
+    ], c.BLUE),
+    "midgame_2": ([
+        [0, c.R_HS, c.B_CN, 0, c.R_GD, 0, c.R_HS, 0, 0],
+        [0, 0, 0, 0, c.R_KG, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, c.R_SD, 0, 0, c.R_SD, 0, c.R_SD, 0, 0],
+        [0, 0, 0, 0, 0, 0, c.R_SD, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [c.B_SD, 0, c.R_SD, 0, c.B_SD, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, c.B_GD, c.B_CN, 0, 0],
+        [0, 0, 0, 0, c.B_GD, 0, c.B_HS, 0, 0],
+        [c.B_CR, c.B_SG, c.B_HS, c.B_KG, 0, 0, c.R_CN, 0, 0],
+    ], c.RED),
+    "endgame_1": ([
+        [0, c.R_CR, 0, 0, 0, 0, c.R_HS, c.R_SG, 0],
+        [0, 0, 0, c.R_KG, c.R_GD, 0, 0, 0, 0],
+        [0, c.R_CN, 0, 0, 0, 0, 0, c.R_CN, 0],
+        [0, 0, 0, 0, 0, 0, 0, c.R_SD, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [c.B_CN, 0, 0, 0, 0, c.B_GD, 0, 0, 0],
+        [0, 0, 0, c.B_KG, c.B_GD, 0, c.B_HS, 0, 0],
+        [0, 0, c.B_SG, 0, 0, 0, c.B_SG, 0, 0],
+    ], c.BLUE),
+    "endgame_2": ([
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, c.R_SG, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, c.R_KG, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [c.R_SD, 0, 0, 0, 0, c.B_SD, 0, 0, 0],
+        [0, 0, 0, 0, c.R_HS, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, c.B_KG, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, c.B_HS, 0, 0, 0, 0, 0, 0],
+    ], c.RED),
+    # 궁성 대각선: 궁성 안의 졸, 귀퉁이의 차, 사를 디딤돌로 쓰는 포
+    "endgame_palace": ([
+        [0, 0, 0, c.B_SD, 0, c.R_KG, 0, 0, 0],
+        [0, 0, 0, 0, c.R_GD, 0, 0, 0, 0],
+        [0, 0, 0, c.R_CN, 0, c.B_CR, 0, 0, 0],
+        [0, 0, c.R_SD, 0, 0, 0, c.R_SD, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, c.B_SD, 0, 0, 0, c.B_SD, 0, 0],
+        [0, 0, 0, c.R_CR, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, c.B_GD, 0, 0, 0, 0],
+        [0, 0, 0, c.R_CN, 0, c.B_KG, c.B_CN, 0, 0],
+    ], c.RED),
+}
+
+# {position name: [[nodes, captures, quiet, palace diagonal] for depth 1, 2, ...]} of the korean_chess_piece generators,
+# pseudo legal (korean_chess_util.get_all_actions) and legal (korean_chess_util.get_legal_actions).
+# a new generator has to reproduce them, regenerate them only when the rules change on purpose.
+REFERENCE_COUNTS = {
+    "endgame_1": [
+        [21, 0, 21, 3],
+        [540, 1, 539, 84],
+        [10517, 25, 10492, 1386],
+        [266940, 2449, 264491, 30120],
+    ],
+    "endgame_2": [
+        [14, 0, 14, 1],
+        [140, 5, 135, 0],
+        [1972, 65, 1907, 150],
+        [20114, 587, 19527, 1195],
+    ],
+    "endgame_palace": [
+        [37, 3, 34, 4],
+        [1295, 203, 1092, 146],
+        [42764, 3934, 38830, 4529],
+        [1428164, 188425, 1239739, 144941],
+    ],
+    "masangmasang_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+        [968698, 3706, 964992, 65932],
+    ],
+    "masangmasang_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+        [963891, 3396, 960495, 66916],
+    ],
+    "masangmasang_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+        [973505, 3939, 969566, 64948],
+    ],
+    "masangmasang_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+        [968698, 3629, 965069, 65932],
+    ],
+    "masangsangma_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+        [963758, 3494, 960264, 65601],
+    ],
+    "masangsangma_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+        [958976, 3264, 955712, 66580],
+    ],
+    "masangsangma_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+        [968540, 3724, 964816, 64622],
+    ],
+    "masangsangma_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+        [963758, 3494, 960264, 65601],
+    ],
+    "midgame_1": [
+        [37, 3, 34, 2],
+        [917, 42, 875, 74],
+        [35628, 2653, 32975, 1859],
+        [998662, 52000, 946662, 71236],
+    ],
+    "midgame_2": [
+        [29, 1, 28, 4],
+        [1022, 61, 961, 58],
+        [30205, 1281, 28924, 3146],
+        [1040080, 62675, 977405, 64969],
+    ],
+    "sangmamasang_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 84, 30575, 2046],
+        [973638, 3841, 969797, 66263],
+    ],
+    "sangmamasang_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 83, 30576, 2046],
+        [968806, 3528, 965278, 67252],
+    ],
+    "sangmamasang_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 85, 30574, 2046],
+        [978470, 4154, 974316, 65274],
+    ],
+    "sangmamasang_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 84, 30575, 2046],
+        [973638, 3841, 969797, 66263],
+    ],
+    "sangmasangma_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+        [968698, 3629, 965069, 65932],
+    ],
+    "sangmasangma_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+        [963891, 3396, 960495, 66916],
+    ],
+    "sangmasangma_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+        [973505, 3939, 969566, 64948],
+    ],
+    "sangmasangma_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+        [968698, 3706, 964992, 65932],
+    ],
+}
+
+LEGAL_REFERENCE_COUNTS = {
+    "endgame_1": [
+        [21, 0, 21, 3],
+        [540, 1, 539, 84],
+        [10330, 25, 10305, 1367],
+    ],
+    "endgame_2": [
+        [14, 0, 14, 1],
+        [114, 5, 109, 0],
+        [1574, 34, 1540, 121],
+    ],
+    "endgame_palace": [
+        [2, 1, 1, 1],
+        [43, 6, 37, 3],
+        [1164, 66, 1098, 110],
+    ],
+    "masangmasang_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+    ],
+    "masangmasang_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+    ],
+    "masangmasang_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+    ],
+    "masangmasang_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+    ],
+    "masangsangma_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+    ],
+    "masangsangma_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+    ],
+    "masangsangma_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+    ],
+    "masangsangma_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30353, 75, 30278, 2108],
+    ],
+    "midgame_1": [
+        [37, 3, 34, 2],
+        [917, 42, 875, 74],
+        [35572, 2651, 32921, 1855],
+    ],
+    "midgame_2": [
+        [28, 1, 27, 3],
+        [907, 59, 848, 29],
+        [26200, 1153, 25047, 2210],
+    ],
+    "sangmamasang_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 84, 30575, 2046],
+    ],
+    "sangmamasang_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 83, 30576, 2046],
+    ],
+    "sangmamasang_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 85, 30574, 2046],
+    ],
+    "sangmamasang_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30659, 84, 30575, 2046],
+    ],
+    "sangmasangma_masangmasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+    ],
+    "sangmasangma_masangsangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 79, 30427, 2077],
+    ],
+    "sangmasangma_sangmamasang": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+    ],
+    "sangmasangma_sangmasangma": [
+        [31, 0, 31, 2],
+        [961, 0, 961, 62],
+        [30506, 80, 30426, 2077],
+    ],
+}
+
+
+def get_positions():
+    """{name: Board} of the 16 start combinations and the stored positions."""
+    positions = {}
+    for blue_position_type, blue_name in enumerate(POSITION_TYPE_NAMES):
+        for red_position_type, red_name in enumerate(POSITION_TYPE_NAMES):
+            state = KoreanChessV1.build_position_state([blue_position_type, red_position_type])
+            positions["%s_%s" % (blue_name, red_name)] = Board.from_state(state, c.BLUE)
+    for name, (state, turn) in STORED_POSITIONS.items():
+        positions[name] = Board.from_state(state, turn)
+    return positions
+
+
+def perft(board, depth, use_legal_actions=False):
+    """Counts the positions reached after depth moves from board.
+
+    Returns [nodes, captures, quiet, palace diagonal], the last three classify the moves of the last ply.
+    Positions where a king has been captured end the game and are not expanded.
+    """
+    counts = [0, 0, 0, 0]
+    if depth > 0:
+        get_actions = u.get_legal_actions if use_legal_actions else u.get_all_actions
+        count_leaves(board, depth, get_actions, counts)
+    else:
+        counts[0] = 1
+    return counts
+
+
+def count_leaves(board, depth, get_actions, counts):
+    actions = get_actions(board, board.turn)
+    if depth == 1:
+        squares = board.squares
+        captures = 0
+        palace_diagonals = 0
+        for action in actions:
+            from_square, to_square = divmod(action, 90)
+            if squares[to_square] != 0:
+                captures += 1
+            # only the palace lines move a piece as far along x as along y
+            if abs(from_square % 9 - to_square % 9) == abs(from_square // 9 - to_square // 9):
+                palace_diagonals += 1
+        counts[0] += len(actions)
+        counts[1] += captures
+        counts[2] += len(actions) - captures
+        counts[3] += palace_diagonals
+        return
+
+    for action in actions:
+        undo = board.make_move(action)
+        if abs(undo[2]) != c.KING:
+            count_leaves(board, depth - 1, get_actions, counts)
+        board.unmake_move(undo)
+
+
+def run(depth, names=None, use_legal_actions=False):
+    """Runs perft on every position (or the named ones) and prints the counts and nodes per second.
+
+    Counts are checked against REFERENCE_COUNTS (LEGAL_REFERENCE_COUNTS) when there is a reference for the depth.
+    Returns the number of positions which differ from the reference.
+    """
+    positions = get_positions()
+    if names is None:
+        names = sorted(positions.keys())
+    total_nodes = 0
+    total_time = 0
+    mismatches = 0
+    for name in names:
+        if name not in positions:
+            raise Exception("unknown perft position : %s" % name)
+        start = time.time()
+        counts = perft(positions[name], depth, use_legal_actions)
+        elapsed = time.time() - start
+        total_nodes += counts[0]
+        total_time += elapsed
+
+        result = ""
+        reference = (LEGAL_REFERENCE_COUNTS if use_legal_actions else REFERENCE_COUNTS).get(name)
+        if reference and 0 < depth <= len(reference):
+            if counts == reference[depth - 1]:
+                result = "ok"
+            else:
+                result = "MISMATCH expected %s" % reference[depth - 1]
+                mismatches += 1
+        print("%-28s depth %d nodes %10d captures %9d quiet %10d palace diagonal %8d %10.0f nps %s" % (
+            name, depth, counts[0], counts[1], counts[2], counts[3], counts[0] / max(elapsed, 1e-9), result))
+
+    print("total nodes %d time %.2fs %.0f nps, %d mismatches" % (
+        total_nodes, total_time, total_nodes / max(total_time, 1e-9), mismatches))
+    return mismatches
@@ -0,0 +1,190 @@
+# coding=utf8
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from game import korean_chess_constant as kcu
+from game.korean_chess_piece import cannon
+from game.korean_chess_piece import car
+from game.korean_chess_piece import guardian
+from game.korean_chess_piece import horse
+from game.korean_chess_piece import sang
+from game.korean_chess_piece import soldier
+
+NUM_SQUARES = (kcu.BOTTOM_WALL + 1) * (kcu.RIGHT_WALL + 1)
+
+
+def build_step_attackers(step_tables):
+    """Inverts the step tables of both sides into {side: attacker squares for every target square}."""
+    attackers = {}
+    for side, step_table in step_tables.items():
+        side_attackers = [[] for _ in range(NUM_SQUARES)]
+        for square, steps in enumerate(step_table):
+            for to_square, _ in steps:
+                side_attackers[to_square].append(square)
+        attackers[side] = side_attackers
+    return attackers
+
+
+# horse, sang, car and cannon moves are the same for both sides, only the generation order differs
+def build_horse_attackers():
+    # (horse square, leg square) for every target square
+    attackers = [[] for _ in range(NUM_SQUARES)]
+    for square, moves in enumerate(horse.MOVE_TABLE[1]):
+        for leg, to_square, _ in moves:
+            attackers[to_square].append((square, leg))
+    return attackers
+
+
+def build_sang_attackers():
+    # (sang square, first leg square, second leg square) for every target square
+    attackers = [[] for _ in range(NUM_SQUARES)]
+    for square, moves in enumerate(sang.MOVE_TABLE[1]):
+        for first_leg, second_leg, to_square, _ in moves:
+            attackers[to_square].append((square, first_leg, second_leg))
+    return attackers
+
+
+def build_car_diagonal_attackers():
+    # (car square, squares in between) along the palace diagonals for every target square
+    attackers = [[] for _ in range(NUM_SQUARES)]
+    for square, rays in enumerate(car.MOVE_TABLE[1]):
+        x, y = square % 9, square // 9
+        for ray in rays:
+            if ray[0][0] % 9 == x or ray[0][0] // 9 == y:
+                continue
+            for i, (to_square, _) in enumerate(ray):
+                attackers[to_square].append((square, tuple(between for between, _ in ray[:i])))
+    return attackers
+
+
+def build_cannon_jump_attackers():
+    # (cannon square, step stone square) along the palace diagonals for every target square
+    attackers = [[] for _ in range(NUM_SQUARES)]
+    for square, jumps in enumerate(cannon.JUMP_TABLE[1]):
+        for step_stone, to_square, _ in jumps:
+            attackers[to_square].append((square, step_stone))
+    return attackers
+
+
+SOLDIER_ATTACKERS = build_step_attackers(soldier.MOVE_TABLE)
+# 궁과 사는 같은 궁성 길을 쓴다
+PALACE_ATTACKERS = build_step_attackers(guardian.MOVE_TABLE)
+HORSE_ATTACKERS = build_horse_attackers()
+SANG_ATTACKERS = build_sang_attackers()
+CAR_DIAGONAL_ATTACKERS = build_car_diagonal_attackers()
+CANNON_JUMP_ATTACKERS = build_cannon_jump_attackers()
+# the orthogonal rays are the same for both sides, walked outward from the target square
+ORTHOGONAL_RAYS = [[[to_square for to_square, _ in ray] for ray in rays] for rays in cannon.MOVE_TABLE[1]]
+
+
+def is_attacked(state_map, square, side):
+    """Whether a piece of side (1 for BLUE, -1 for RED) can move onto square.
+
+    The piece on square, if any, is assumed to be an opponent piece, so this answers whether it can be captured.
+    """
+    soldier_num = side * kcu.SOLDIER
+    for from_square in SOLDIER_ATTACKERS[side][square]:
+        if state_map[from_square] == soldier_num:
+            return True
+
+    horse_num = side * kcu.HORSE
+    for from_square, leg in HORSE_ATTACKERS[square]:
+        if state_map[from_square] == horse_num and state_map[leg] == 0:
+            return True
+
+    sang_num = side * kcu.SANG
+    for from_square, first_leg, second_leg in SANG_ATTACKERS[square]:
+        if state_map[from_square] == sang_num and state_map[first_leg] == 0 and state_map[second_leg] == 0:
+            return True
+
+    for from_square in PALACE_ATTACKERS[side][square]:
+        piece = state_map[from_square] * side
+        if piece == kcu.KING or piece == kcu.GUARDIAN:
+            return True
+
+    # 차는 첫번째 말, 포는 포가 아닌 디딤돌 다음의 말
+    car_num = side * kcu.CAR
+    cannon_num = side * kcu.CANNON
+    cannon_target = abs(state_map[square]) == kcu.CANNON
+    for ray in ORTHOGONAL_RAYS[square]:
+        has_step_stone = False
+        for to_square in ray:
+            piece = state_map[to_square]
+            if piece == 0:
+                continue
+            if not has_step_stone:
+                if piece == car_num:
+                    return True
+                if abs(piece) == kcu.CANNON:
+                    break
+                has_step_stone = True
+                continue
+            if piece == cannon_num and not cannon_target:
+                return True
+            break
+
+    # 궁성 대각선 길
+    for from_square, between in CAR_DIAGONAL_ATTACKERS[square]:
+        if state_map[from_square] == car_num:
+            for between_square in between:
+                if state_map[between_square] != 0:
+                    break
+            else:
+                return True
+
+    for from_square, step_stone in CANNON_JUMP_ATTACKERS[square]:
+        if state_map[from_square] == cannon_num and state_map[step_stone] != 0 \
+                and abs(state_map[step_stone]) != kcu.CANNON:
+            return True
+
+    return False
+
+
+def get_check_squares(state_map, square, side):
+    """Squares where a move of the other side can open an attack of side (1 for BLUE, -1 for RED) on square.
+
+    A single move can't bring a new attacker, so only the legs, palace diagonals and orthogonal rays of the cars,
+    cannons, horses and sangs of side already around square matter. A ray counts when one of its first three pieces is
+    a car or cannon of side, and then its squares up to the second piece are check squares.
+    """
+    check_squares = set()
+    horse_num = side * kcu.HORSE
+    for from_square, leg in HORSE_ATTACKERS[square]:
+        if state_map[from_square] == horse_num:
+            check_squares.add(leg)
+
+    sang_num = side * kcu.SANG
+    for from_square, first_leg, second_leg in SANG_ATTACKERS[square]:
+        if state_map[from_square] == sang_num:
+            check_squares.add(first_leg)
+            check_squares.add(second_leg)
+
+    car_num = side * kcu.CAR
+    cannon_num = side * kcu.CANNON
+    for from_square, between in CAR_DIAGONAL_ATTACKERS[square]:
+        if state_map[from_square] == car_num:
+            check_squares.update(between)
+
+    for from_square, step_stone in CANNON_JUMP_ATTACKERS[square]:
+        if state_map[from_square] == cannon_num:
+            check_squares.add(step_stone)
+
+    for ray in ORTHOGONAL_RAYS[square]:
+        ray_squares = []
+        num_pieces = 0
+        has_attacker = False
+        for to_square in ray:
+            piece = state_map[to_square]
+            if num_pieces < 2:
+                ray_squares.append(to_square)
+            if piece != 0:
+                num_pieces += 1
+                if piece == car_num or piece == cannon_num:
+                    has_attacker = True
+                    break
+                if num_pieces == 3:
+                    break
+        if has_attacker:
+            check_squares.update(ray_squares)
+    return check_squares
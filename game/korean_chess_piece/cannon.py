@@ -4,216 +4,60 @@ from __future__ import division
 from __future__ import print_function
 
 from game import korean_chess_constant as kcu
-
-
-def get_actions(state_map, x, y):
-    piece = state_map[y][x]
-
-    side = piece[0]
+from game.korean_chess_piece import move_table
+
+# 궁성 대각선 길 : 모서리에서 왕자리를 디딤돌로 건너뛴다
+JUMP_TABLE = {side: [[(ray[0][0], ray[1][0], ray[1][1]) for ray in rays] for rays in ray_table]
+              for side, ray_table in move_table.build_ray_table([
+                  # 대각선 오른쪽 전진 길
+                  ((1, -1), lambda x, y: (x, y) in ((3, 9), (3, 2)), 2),
+                  # 대각선 왼쪽 전진 길
+                  ((-1, -1), lambda x, y: (x, y) in ((5, 9), (5, 2)), 2),
+                  # 대각선 오른쪽 후진 길
+                  ((1, 1), lambda x, y: (x, y) in ((3, 7), (3, 0)), 2),
+                  # 대각선 왼쪽 후진 길
+                  ((-1, 1), lambda x, y: (x, y) in ((5, 7), (5, 0)), 2),
+              ]).items()}
+
+MOVE_TABLE = move_table.build_ray_table([
+    # 전진 길
+    ((0, -1), None, kcu.BOTTOM_WALL),
+    # 오른쪽 길
+    ((1, 0), None, kcu.RIGHT_WALL),
+    # 왼쪽 길
+    ((-1, 0), None, kcu.RIGHT_WALL),
+    # 후진 길
+    ((0, 1), None, kcu.BOTTOM_WALL),
+])
+
+
+def get_actions(state_map, square):
+    side = kcu.get_side(state_map[square])
 
     action_list = []
-
-    piece_type = kcu.CANNON
-
-    # 대각선 오른쪽 전진 길 체크
-    if (y == 9 and x == 3) or (y == 2 and x == 3):
+    for step_stone, to_square, action in JUMP_TABLE[side][square]:
         # 왕자리에 디딤돌이 있는지 체크 (포가아니면서 빈자리가 아니면됨)
-
-        step_stone_x = x + 1
-        step_stone_y = y - 1
-        if kcu.is_piece(state_map, step_stone_x, step_stone_y) \
-          and not kcu.is_cannon(state_map, step_stone_x, step_stone_y):
-            # 디딤돌 다음 자리에 상대편이나(포가 아니면서) 빈자리가 있는지 체크
-            next_of_step_stone_x = step_stone_x + 1
-            next_of_step_stone_y = step_stone_y - 1
-            if kcu.is_empty_space(state_map, next_of_step_stone_x, next_of_step_stone_y) \
-              or kcu.is_enemy(state_map, next_of_step_stone_x, next_of_step_stone_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': next_of_step_stone_x, 'to_y': next_of_step_stone_y})
-
-    # 대각선 왼쪽 전진 길 체크
-    if (y == 9 and x == 5) or (y == 2 and x == 5):
-        # 왕자리에 디딤돌이 있는지 체크 (포가아니면서 빈자리가 아니면됨)
-        step_stone_x = x - 1
-        step_stone_y = y - 1
-        if kcu.is_piece(state_map, step_stone_x, step_stone_y) \
-          and not kcu.is_cannon(state_map, step_stone_x, step_stone_y):
-            # 디딤돌 다음 자리에 상대편이나(포가 아니면서) 빈자리가 있는지 체크
-            next_of_step_stone_x = step_stone_x - 1
-            next_of_step_stone_y = step_stone_y - 1
-            if kcu.is_empty_space(state_map, next_of_step_stone_x, next_of_step_stone_y) \
-              or kcu.is_enemy(state_map, next_of_step_stone_x, next_of_step_stone_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': next_of_step_stone_x, 'to_y': next_of_step_stone_y})
-
-    # 대각선 오른쪽 후진 길 체크
-    if (y == 7 and x == 3) or (y == 0 and x == 3):
-        # 왕자리에 디딤돌이 있는지 체크 (포가아니면서 빈자리가 아니면됨)
-        step_stone_x = x + 1
-        step_stone_y = y + 1
-        if kcu.is_piece(state_map, step_stone_x, step_stone_y) \
-          and not kcu.is_cannon(state_map, step_stone_x, step_stone_y):
-            # 디딤돌 다음 자리에 상대편이나(포가 아니면서) 빈자리가 있는지 체크
-            next_of_step_stone_x = step_stone_x + 1
-            next_of_step_stone_y = step_stone_y + 1
-            if kcu.is_empty_space(state_map, next_of_step_stone_x, next_of_step_stone_y) \
-              or kcu.is_enemy(state_map, next_of_step_stone_x, next_of_step_stone_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': next_of_step_stone_x, 'to_y': next_of_step_stone_y})
-
-    # 대각선 왼쪽 후진 길 체크
-    if (y == 7 and x == 5) or (y == 0 and x == 5):
-        # 왕자리에 디딤돌이 있는지 체크 (포가아니면서 빈자리가 아니면됨)
-        step_stone_x = x - 1
-        step_stone_y = y + 1
-        if kcu.is_piece(state_map, step_stone_x, step_stone_y) \
-          and not kcu.is_cannon(state_map, step_stone_x, step_stone_y):
-            # 디딤돌 다음 자리에 상대편이나(포가 아니면서) 빈자리가 있는지 체크
-            next_of_step_stone_x = step_stone_x - 1
-            next_of_step_stone_y = step_stone_y + 1
-            if kcu.is_empty_space(state_map, next_of_step_stone_x, next_of_step_stone_y) \
-              or kcu.is_enemy(state_map, next_of_step_stone_x, next_of_step_stone_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': next_of_step_stone_x, 'to_y': next_of_step_stone_y})
-
-    # 전진 길 체크
-    if y > kcu.TOP_WALL + 1:
-        moving_y = y - 1
-        step_stone_y = 0
-        while moving_y > kcu.TOP_WALL:
-            # 건널수 있는게 있는지 검색
-            # 가장먼저 포가 나오면 실패
-            if kcu.is_cannon(state_map, x, moving_y):
+        if state_map[step_stone] != 0 and abs(state_map[step_stone]) != kcu.CANNON \
+                and state_map[to_square] * side <= 0:
+            action_list.append(action)
+
+    for ray in MOVE_TABLE[side][square]:
+        has_step_stone = False
+        for to_square, action in ray:
+            piece = state_map[to_square]
+            if not has_step_stone:
+                if piece == 0:
+                    continue
+                # 가장먼저 포가 나오면 실패
+                if abs(piece) == kcu.CANNON:
+                    break
+                has_step_stone = True
+                continue
+            # 포이거나 우리편이면 정지
+            if piece * side > 0 or abs(piece) == kcu.CANNON:
+                break
+            action_list.append(action)
+            if piece != 0:
                 break
 
-            if kcu.is_piece(state_map, x, moving_y) and not kcu.is_cannon(state_map, x, moving_y):
-                step_stone_y = moving_y
-                break
-            moving_y -= 1
-
-        # 포가아닌 말의 한칸후부터 포이거나 우리편말이나오기 전칸까지 액션 추가
-        if step_stone_y > kcu.TOP_WALL and step_stone_y < y:
-            next_of_step_stone_y = step_stone_y - 1
-            step = 1
-            add_step = y - step_stone_y
-            while next_of_step_stone_y >= kcu.TOP_WALL:
-                # 포이거나 우리편이면 정지
-                if kcu.is_cannon(state_map, x, next_of_step_stone_y) or \
-                  kcu.is_our_side(state_map, x, next_of_step_stone_y, side):
-                    break
-
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': x, 'to_y': next_of_step_stone_y})
-
-                if kcu.is_enemy(state_map, x, next_of_step_stone_y, side):
-                    break
-
-                next_of_step_stone_y -= 1
-                step += 1
-
-    # 오른쪽 길 체크
-    if x < kcu.RIGHT_WALL - 1:
-        moving_x = x + 1
-        step_stone_x = 0
-        while moving_x < kcu.RIGHT_WALL:
-            # 건널수 있는게 있는지 검색
-            # 가장먼저 포가 나오면 실패
-            if kcu.is_cannon(state_map, moving_x, y):
-                break
-
-            if kcu.is_piece(state_map, moving_x, y) and not kcu.is_cannon(state_map, moving_x, y):
-                step_stone_x = moving_x
-                break
-            moving_x += 1
-
-        # 포가아닌 말의 한칸후부터 포이거나 우리편말이나오기 전칸까지 액션 추가
-        if step_stone_x < kcu.RIGHT_WALL and step_stone_x > x:
-            next_of_step_stone_x = step_stone_x + 1
-            step = 1
-            add_step = step_stone_x - x
-            while next_of_step_stone_x <= kcu.RIGHT_WALL:
-                # 포이거나 우리편이면 정지
-                if kcu.is_cannon(state_map, next_of_step_stone_x, y) or \
-                  kcu.is_our_side(state_map, next_of_step_stone_x, y, side):
-                    break
-
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': next_of_step_stone_x, 'to_y': y})
-
-                if kcu.is_enemy(state_map, next_of_step_stone_x, y, side):
-                    break
-
-                next_of_step_stone_x += 1
-                step += 1
-
-    # 왼쪽 길 체크
-    if x > kcu.LEFT_WALL + 1:
-        moving_x = x - 1
-        step_stone_x = 0
-        while moving_x > kcu.LEFT_WALL:
-            # 건널수 있는게 있는지 검색
-            # 가장먼저 포가 나오면 실패
-            if kcu.is_cannon(state_map, moving_x, y):
-                break
-
-            if kcu.is_piece(state_map, moving_x, y) and not kcu.is_cannon(state_map, moving_x, y):
-                step_stone_x = moving_x
-                break
-            moving_x -= 1
-
-        # 포가아닌 말의 한칸후부터 포이거나 우리편말이나오기 전칸까지 액션 추가
-        if step_stone_x > kcu.LEFT_WALL and step_stone_x < x:
-            next_of_step_stone_x = step_stone_x - 1
-            step = 1
-            add_step = x - step_stone_x
-            while next_of_step_stone_x >= kcu.LEFT_WALL:
-                # 포이거나 우리편이면 정지
-                if kcu.is_cannon(state_map, next_of_step_stone_x, y) or \
-                  kcu.is_our_side(state_map, next_of_step_stone_x, y, side):
-                    break
-
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': next_of_step_stone_x, 'to_y': y})
-
-                if kcu.is_enemy(state_map, next_of_step_stone_x, y, side):
-                    break
-
-                next_of_step_stone_x -= 1
-                step += 1
-
-    # 후진 길 체크
-    if y < kcu.BOTTOM_WALL - 1:
-        moving_y = y + 1
-        step_stone_y = 0
-        while moving_y < kcu.BOTTOM_WALL:
-            # 건널수 있는게 있는지 검색
-            # 가장먼저 포가 나오면 실패
-            if kcu.is_cannon(state_map, x, moving_y):
-                break
-
-            if kcu.is_piece(state_map, x, moving_y) and not kcu.is_cannon(state_map, x, moving_y):
-                step_stone_y = moving_y
-                break
-            moving_y += 1
-
-        # 포가아닌 말의 한칸후부터 포이거나 우리편말이나오기 전칸까지 액션 추가
-        if step_stone_y < kcu.BOTTOM_WALL and step_stone_y > y:
-            next_of_step_stone_y = step_stone_y + 1
-            step = 1
-            add_step = step_stone_y - y
-            while next_of_step_stone_y <= kcu.BOTTOM_WALL:
-                # 포이거나 우리편이면 정지
-                if kcu.is_cannon(state_map, x, next_of_step_stone_y) or \
-                  kcu.is_our_side(state_map, x, next_of_step_stone_y, side):
-                    break
-
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': x, 'to_y': next_of_step_stone_y})
-
-                if kcu.is_enemy(state_map, x, next_of_step_stone_y, side):
-                    break
-
-                next_of_step_stone_y += 1
-                step += 1
-
     return action_list
@@ -4,176 +4,48 @@ from __future__ import division
 from __future__ import print_function
 
 from game import korean_chess_constant as kcu
-
-
-def get_actions(state_map, x, y):
-    piece = state_map[y][x]
-
-    side = piece[0]
+from game.korean_chess_piece import move_table
+
+
+def is_palace_center(x, y):
+    return (x, y) in ((4, 8), (4, 1))
+
+
+MOVE_TABLE = move_table.build_ray_table([
+    # 대각선 오른쪽 전진 길
+    ((1, -1), lambda x, y: (x, y) in ((3, 9), (3, 2)), 2),
+    ((1, -1), is_palace_center, 1),
+    # 대각선 왼쪽 전진 길
+    ((-1, -1), lambda x, y: (x, y) in ((5, 9), (5, 2)), 2),
+    ((-1, -1), is_palace_center, 1),
+    # 대각선 오른쪽 후진 길
+    ((1, 1), lambda x, y: (x, y) in ((3, 7), (3, 0)), 2),
+    ((1, 1), is_palace_center, 1),
+    # 대각선 왼쪽 후진 길
+    ((-1, 1), lambda x, y: (x, y) in ((5, 7), (5, 0)), 2),
+    ((-1, 1), is_palace_center, 1),
+    # 전진 길
+    ((0, -1), None, kcu.BOTTOM_WALL),
+    # 오른쪽 길
+    ((1, 0), None, kcu.RIGHT_WALL),
+    # 왼쪽 길
+    ((-1, 0), None, kcu.RIGHT_WALL),
+    # 후진 길
+    ((0, 1), None, kcu.BOTTOM_WALL),
+])
+
+
+def get_actions(state_map, square):
+    side = kcu.get_side(state_map[square])
 
     action_list = []
-
-    piece_type = kcu.CAR
-
-    # 대각선 오른쪽 전진 길 체크
-    if (y == 9 and x == 3) or (y == 2 and x == 3):
-        moving_y = y - 1
-        moving_x = x + 1
-        step = 1
-        while moving_y >= y - 2:
-            if not kcu.is_our_side(state_map, moving_x, moving_y, side):
-                # if not kcu.is_losing_way(state_map, x, y, moving_x, moving_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': moving_x, 'to_y': moving_y})
-                if kcu.is_enemy(state_map, moving_x, moving_y, side):
-                    break
-            else:
-                break
-            moving_y -= 1
-            moving_x += 1
-            step += 1
-
-    if (y == 8 and x == 4) or (y == 1 and x == 4):
-        if not kcu.is_our_side(state_map, x + 1, y - 1, side):
-            # if not kcu.is_losing_way(state_map, x, y, x + 1, y - 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y - 1})
-
-    # 대각선 왼쪽 전진 길 체크
-    if (y == 9 and x == 5) or (y == 2 and x == 5):
-        moving_y = y - 1
-        moving_x = x - 1
-        step = 1
-        while moving_y >= y - 2:
-            if not kcu.is_our_side(state_map, moving_x, moving_y, side):
-                # if not kcu.is_losing_way(state_map, x, y, moving_x, moving_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': moving_x, 'to_y': moving_y})
-                if kcu.is_enemy(state_map, moving_x, moving_y, side):
-                    break
-            else:
-                break
-            moving_y -= 1
-            moving_x -= 1
-            step += 1
-
-    if (y == 8 and x == 4) or (y == 1 and x == 4):
-        if not kcu.is_our_side(state_map, x - 1, y - 1, side):
-            # if not kcu.is_losing_way(state_map, x, y, x - 1, y - 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y - 1})
-
-    # 대각선 오른쪽 후진 길 체크
-    if (y == 7 and x == 3) or (y == 0 and x == 3):
-        moving_y = y + 1
-        moving_x = x + 1
-        step = 1
-        while moving_y <= y + 2:
-            if not kcu.is_our_side(state_map, moving_x, moving_y, side):
-                # if not kcu.is_losing_way(state_map, x, y, moving_x, moving_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': moving_x, 'to_y': moving_y})
-                if kcu.is_enemy(state_map, moving_x, moving_y, side):
-                    break
-            else:
+    for ray in MOVE_TABLE[side][square]:
+        for to_square, action in ray:
+            piece = state_map[to_square] * side
+            if piece > 0:
                 break
-            moving_y += 1
-            moving_x += 1
-            step += 1
-
-    if (y == 8 and x == 4) or (y == 1 and x == 4):
-        if not kcu.is_our_side(state_map, x + 1, y + 1, side):
-            # if not kcu.is_losing_way(state_map, x, y, x + 1, y + 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y + 1})
-
-    # 대각선 왼쪽 후진 길 체크
-    if (y == 7 and x == 5) or (y == 0 and x == 5):
-        moving_y = y + 1
-        moving_x = x - 1
-        step = 1
-        while moving_y <= y + 2:
-            if not kcu.is_our_side(state_map, moving_x, moving_y, side):
-                # if not kcu.is_losing_way(state_map, x, y, moving_x, moving_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': moving_x, 'to_y': moving_y})
-                if kcu.is_enemy(state_map, moving_x, moving_y, side):
-                    break
-            else:
-                break
-            moving_y += 1
-            moving_x -= 1
-            step += 1
-
-    if (y == 8 and x == 4) or (y == 1 and x == 4):
-        if not kcu.is_our_side(state_map, x - 1, y + 1, side):
-            # if not kcu.is_losing_way(state_map, x, y, x - 1, y + 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x -1, 'to_y': y + 1})
-
-    # 전진 길 체크
-    if y > 0:
-        moving_y = y - 1
-        step = 1
-        while moving_y >= 0:
-            if not kcu.is_our_side(state_map, x, moving_y, side):
-                # if not kcu.is_losing_way(state_map, x, y, x, moving_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': x, 'to_y': moving_y})
-                if kcu.is_enemy(state_map, x, moving_y, side):
-                    break
-            else:
-                break
-            moving_y -= 1
-            step += 1
-
-    # 오른쪽 길 체크
-    if x < 8:
-        moving_x = x + 1
-        step = 1
-        while moving_x <= 8:
-            if not kcu.is_our_side(state_map, moving_x, y, side):
-                # if not kcu.is_losing_way(state_map, x, y, moving_x, y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': moving_x, 'to_y': y})
-                if kcu.is_enemy(state_map, moving_x, y, side):
-                    break
-            else:
-                break
-            moving_x += 1
-            step += 1
-
-    # 왼쪽 길 체크
-    if x > 0:
-        moving_x = x - 1
-        step = 1
-        while moving_x >= 0:
-            if not kcu.is_our_side(state_map, moving_x, y, side):
-                # if not kcu.is_losing_way(state_map, x, y, moving_x, y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': moving_x, 'to_y': y})
-                if kcu.is_enemy(state_map, moving_x, y, side):
-                    break
-            else:
-                break
-            moving_x -= 1
-            step += 1
-
-    # 후진 길 체크
-    if y < 9:
-        moving_y = y + 1
-        step = 1
-        while moving_y <= 9:
-            if not kcu.is_our_side(state_map, x, moving_y, side):
-                # if not kcu.is_losing_way(state_map, x, y, x, moving_y, side):
-                action_list.append(
-                    {'from_x': x, 'from_y': y, 'to_x': x, 'to_y': moving_y})
-
-                if kcu.is_enemy(state_map, x, moving_y, side):
-                    break
-            else:
+            action_list.append(action)
+            if piece < 0:
                 break
-            moving_y += 1
-            step += 1
 
     return action_list
@@ -4,63 +4,36 @@ from __future__ import division
 from __future__ import print_function
 
 from game import korean_chess_constant as kcu
+from game.korean_chess_piece import move_table
 
+# (dx, dy, leg dx, leg dy) in generation order
+# 대각선 오른쪽 전진 1, 2 / 왼쪽 전진 1, 2 / 오른쪽 후진 1, 2 / 왼쪽 후진 1, 2
+DIRECTIONS = [(1, -2, 0, -1), (2, -1, 1, 0), (-1, -2, 0, -1), (-2, -1, -1, 0),
+              (1, 2, 0, 1), (2, 1, 1, 0), (-1, 2, 0, 1), (-2, 1, -1, 0)]
 
-def get_actions(state_map, x, y):
-    piece = state_map[y][x]
 
-    side = piece[0]
+def build_moves(x, y, side):
+    # (leg square, target square, action) of a square
+    square = y * 9 + x
+    moves = []
+    for dx, dy, leg_dx, leg_dy in DIRECTIONS:
+        to_x = x + dx * side
+        to_y = y + dy * side
+        if kcu.is_inside(to_x, to_y):
+            to_square = to_y * 9 + to_x
+            moves.append(((y + leg_dy * side) * 9 + x + leg_dx * side, to_square, kcu.build_action(square, to_square)))
+    return moves
 
-    action_list = []
-
-    piece_type = kcu.HORSE
-
-    # 대각선 오른쪽 전진 1 길 체크
-    if x < kcu.RIGHT_WALL and y > kcu.TOP_WALL + 1:
-        if kcu.is_empty_space(state_map, x, y - 1) and not kcu.is_our_side(state_map, x + 1, y - 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y - 2})
-
-    # 대각선 오른쪽 전진 2 길 체크
-    if x < kcu.RIGHT_WALL - 1 and y > kcu.TOP_WALL:
-        if kcu.is_empty_space(state_map, x + 1, y) and not kcu.is_our_side(state_map, x + 2, y - 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 2, 'to_y': y - 1})
 
-    # 대각선 왼쪽 전진 1 길 체크
-    if x > kcu.LEFT_WALL and y > kcu.TOP_WALL + 1:
-        if kcu.is_empty_space(state_map, x, y - 1) and not kcu.is_our_side(state_map, x - 1, y - 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y - 2})
+MOVE_TABLE = move_table.build_side_tables(build_moves)
 
-    # 대각선 왼쪽 전진 2 길 체크
-    if x > kcu.LEFT_WALL + 1 and y > kcu.TOP_WALL:
-        if kcu.is_empty_space(state_map, x - 1, y) and not kcu.is_our_side(state_map, x - 2, y - 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 2, 'to_y': y - 1})
 
-    # 대각선 오른쪽 후진 1 길 체크
-    if x < kcu.RIGHT_WALL and y < kcu.BOTTOM_WALL - 1:
-        if kcu.is_empty_space(state_map, x, y + 1) and not kcu.is_our_side(state_map, x + 1, y + 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y + 2})
+def get_actions(state_map, square):
+    side = kcu.get_side(state_map[square])
 
-    # 대각선 오른쪽 후진 2 길 체크
-    if x < kcu.RIGHT_WALL - 1 and y < kcu.BOTTOM_WALL:
-        if kcu.is_empty_space(state_map, x + 1, y) and not kcu.is_our_side(state_map, x + 2, y + 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 2, 'to_y': y + 1})
-
-    # 대각선 왼쪽 후진 1 길 체크
-    if x > kcu.LEFT_WALL and y < kcu.BOTTOM_WALL - 1:
-        if kcu.is_empty_space(state_map, x, y + 1) and not kcu.is_our_side(state_map, x - 1, y + 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y + 2})
-
-    # 대각선 왼쪽 후진 2 길 체크
-    if x > kcu.LEFT_WALL + 1 and y < kcu.BOTTOM_WALL:
-        if kcu.is_empty_space(state_map, x - 1, y) and not kcu.is_our_side(state_map, x - 2, y + 1, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 2, 'to_y': y + 1})
+    action_list = []
+    for leg, to_square, action in MOVE_TABLE[side][square]:
+        if state_map[leg] == 0 and state_map[to_square] * side <= 0:
+            action_list.append(action)
 
     return action_list
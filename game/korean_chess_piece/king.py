@@ -4,67 +4,36 @@ from __future__ import division
 from __future__ import print_function
 
 from game import korean_chess_constant as kcu
-
-
-def get_actions(state_map, x, y):
-    piece = state_map[y][x]
-
-    side = piece[0]
+from game.korean_chess_piece import move_table
+
+PALACE_STEPS = [
+    # 대각선 오른쪽 전진 길
+    ((1, -1), lambda x, y: (x, y) in ((3, 9), (4, 8))),
+    # 대각선 왼쪽 전진 길
+    ((-1, -1), lambda x, y: (x, y) in ((5, 9), (4, 8))),
+    # 대각선 오른쪽 후진 길
+    ((1, 1), lambda x, y: (x, y) in ((3, 7), (4, 8))),
+    # 대각선 왼쪽 후진 길
+    ((-1, 1), lambda x, y: (x, y) in ((5, 7), (4, 8))),
+    # 전진 길
+    ((0, -1), lambda x, y: y in (8, 9)),
+    # 오른쪽 길
+    ((1, 0), lambda x, y: x in (3, 4)),
+    # 왼쪽 길
+    ((-1, 0), lambda x, y: x in (4, 5)),
+    # 후진 길
+    ((0, 1), lambda x, y: y in (7, 8)),
+]
+
+MOVE_TABLE = move_table.build_step_table(PALACE_STEPS)
+
+
+def get_actions(state_map, square):
+    side = kcu.get_side(state_map[square])
 
     action_list = []
-
-    piece_type = kcu.KING
-
-    # 대각선 오른쪽 전진 길 체크
-    if ((y == 9 and x == 3) or (y == 8 and x == 4)) and \
-            not kcu.is_our_side(state_map, x + 1, y - 1, side):
-        # and not kcu.is_losing_way(state_map, x, y, x + 1, y - 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y - 1})
-
-    # 대각선 왼쪽 전진 길 체크
-    if ((y == 9 and x == 5) or (y == 8 and x == 4)) and \
-            not kcu.is_our_side(state_map, x - 1, y - 1, side):
-        # and not kcu.is_losing_way(state_map, x, y, x - 1, y - 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y - 1})
-
-    # 대각선 오른쪽 후진 길 체크
-    if ((y == 7 and x == 3) or (y == 8 and x == 4)) and \
-            not kcu.is_our_side(state_map, x + 1, y + 1, side):
-        # and not kcu.is_losing_way(state_map, x, y, x + 1, y + 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y + 1})
-
-    # 대각선 왼쪽 후진 길 체크
-    if ((y == 7 and x == 5) or (y == 8 and x == 4)) and \
-            not kcu.is_our_side(state_map, x - 1, y + 1, side):
-        # and not kcu.is_losing_way(state_map, x, y, x - 1, y + 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y + 1})
-
-    # 전진 길 체크
-    if y in (8, 9) and not kcu.is_our_side(state_map, x, y - 1, side):
-        # and   not kcu.is_losing_way(state_map, x, y, x, y - 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x, 'to_y': y - 1})
-
-    # 오른쪽 길 체크
-    if x in (3, 4) and not kcu.is_our_side(state_map, x + 1, y, side):
-        # and  not kcu.is_losing_way(state_map, x, y, x + 1, y, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y})
-
-    # 왼쪽 길 체크
-    if x in (4, 5) and not kcu.is_our_side(state_map, x - 1, y, side):
-        # and   not kcu.is_losing_way(state_map, x, y, x - 1, y, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y})
-
-    # 후진 길 체크
-    if y in (7, 8) and not kcu.is_our_side(state_map, x, y + 1, side):
-        # and   not kcu.is_losing_way(state_map, x, y, x, y + 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x, 'to_y': y + 1})
+    for to_square, action in MOVE_TABLE[side][square]:
+        if state_map[to_square] * side <= 0:
+            action_list.append(action)
 
     return action_list
@@ -0,0 +1,62 @@
+# coding=utf8
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from game import korean_chess_constant as kcu
+
+# 1 for BLUE, -1 for RED as in the board piece codes
+SIDES = (1, -1)
+
+
+def get_side_xy(x, y, side):
+    """Coordinates of a square seen by side.
+
+    The tables are written for BLUE, which moves forward to y = 0 and has its palace at the bottom. RED moves the
+    other way with its palace at the top, so it sees the board turned around.
+    """
+    if side > 0:
+        return x, y
+    return kcu.RIGHT_WALL - x, kcu.BOTTOM_WALL - y
+
+
+def build_side_tables(build_square):
+    """Builds {side: table} where table[square] = build_square(x, y, side)."""
+    return {side: [build_square(x, y, side) for y in range(kcu.BOTTOM_WALL + 1) for x in range(kcu.RIGHT_WALL + 1)]
+            for side in SIDES}
+
+
+def build_ray_table(directions):
+    """Builds the rays of a piece for every square and both sides, once at import.
+
+    directions is a list of ((dx, dy), condition, max_steps) in generation order, written for BLUE (see
+    get_side_xy). condition(x, y) tells whether the direction is available from the square (None means always)
+    and max_steps limits the length of the ray. A ray is a list of (target square, action) and empty rays are
+    skipped.
+    """
+
+    def build_rays(x, y, side):
+        side_x, side_y = get_side_xy(x, y, side)
+        square = y * 9 + x
+        rays = []
+        for (dx, dy), condition, max_steps in directions:
+            if condition is not None and not condition(side_x, side_y):
+                continue
+            ray = []
+            to_x = x + dx * side
+            to_y = y + dy * side
+            while kcu.is_inside(to_x, to_y) and len(ray) < max_steps:
+                ray.append((to_y * 9 + to_x, kcu.build_action(square, to_y * 9 + to_x)))
+                to_x += dx * side
+                to_y += dy * side
+            if ray:
+                rays.append(ray)
+        return rays
+
+    return build_side_tables(build_rays)
+
+
+def build_step_table(directions):
+    """Builds the one step targets, a list of (target square, action), for every square and both sides."""
+    ray_tables = build_ray_table([(direction, condition, 1) for direction, condition in directions])
+    return {side: [[ray[0] for ray in rays] for rays in ray_table] for side, ray_table in ray_tables.items()}
@@ -4,79 +4,40 @@ from __future__ import division
 from __future__ import print_function
 
 from game import korean_chess_constant as kcu
+from game.korean_chess_piece import move_table
 
+# ((dx, dy), first leg, second leg) in generation order
+# 대각선 오른쪽 전진 1, 2 / 왼쪽 전진 1, 2 / 오른쪽 후진 1, 2 / 왼쪽 후진 1, 2
+DIRECTIONS = [((2, -3), (0, -1), (1, -2)), ((3, -2), (1, 0), (2, -1)),
+              ((-2, -3), (0, -1), (-1, -2)), ((-3, -2), (-1, 0), (-2, -1)),
+              ((2, 3), (0, 1), (1, 2)), ((3, 2), (1, 0), (2, 1)),
+              ((-2, 3), (0, 1), (-1, 2)), ((-3, 2), (-1, 0), (-2, 1))]
 
-def get_actions(state_map, x, y):
-    piece = state_map[y][x]
 
-    side = piece[0]
+def build_moves(x, y, side):
+    # (first leg square, second leg square, target square, action) of a square
+    square = y * 9 + x
+    moves = []
+    for (dx, dy), first_leg, second_leg in DIRECTIONS:
+        to_x = x + dx * side
+        to_y = y + dy * side
+        if kcu.is_inside(to_x, to_y):
+            to_square = to_y * 9 + to_x
+            moves.append(((y + first_leg[1] * side) * 9 + x + first_leg[0] * side,
+                          (y + second_leg[1] * side) * 9 + x + second_leg[0] * side, to_square,
+                          kcu.build_action(square, to_square)))
+    return moves
 
-    action_list = []
-
-    piece_type = kcu.SANG
-
-    # 대각선 오른쪽 전진 1 길 체크
-    if x < 7 and y > 2:
-        if kcu.is_empty_space(state_map, x, y - 1) \
-                and kcu.is_empty_space(state_map, x + 1, y - 2) \
-                and not kcu.is_our_side(state_map, x + 2, y - 3, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 2, 'to_y': y - 3})
-
-    # 대각선 오른쪽 전진 2 길 체크
-    if x < 6 and y > 1:
-        if kcu.is_empty_space(state_map, x + 1, y) \
-                and kcu.is_empty_space(state_map, x + 2, y - 1) \
-                and not kcu.is_our_side(state_map, x + 3, y - 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 3, 'to_y': y - 2})
 
-    # 대각선 왼쪽 전진 1 길 체크
-    if x > 1 and y > 2:
-        if kcu.is_empty_space(state_map, x, y - 1) \
-                and kcu.is_empty_space(state_map, x - 1, y - 2) \
-                and not kcu.is_our_side(state_map, x - 2, y - 3, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 2, 'to_y': y - 3})
+MOVE_TABLE = move_table.build_side_tables(build_moves)
 
-    # 대각선 왼쪽 전진 2 길 체크
-    if x > 2 and y > 1:
-        if kcu.is_empty_space(state_map, x - 1, y) \
-                and kcu.is_empty_space(state_map, x - 2, y - 1) \
-                and not kcu.is_our_side(state_map, x - 3, y - 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 3, 'to_y': y - 2})
 
-    # 대각선 오른쪽 후진 1 길 체크
-    if x < 7 and y < 7:
-        if kcu.is_empty_space(state_map, x, y + 1) \
-                and kcu.is_empty_space(state_map, x + 1, y + 2) \
-                and not kcu.is_our_side(state_map, x + 2, y + 3, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 2, 'to_y': y + 3})
+def get_actions(state_map, square):
+    side = kcu.get_side(state_map[square])
 
-    # 대각선 오른쪽 후진 2 길 체크
-    if x < 6 and y < 8:
-        if kcu.is_empty_space(state_map, x + 1, y) \
-                and kcu.is_empty_space(state_map, x + 2, y + 1) \
-                and not kcu.is_our_side(state_map, x + 3, y + 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x + 3, 'to_y': y + 2})
-
-    # 대각선 왼쪽 후진 1 길 체크
-    if x > 1 and y < 7:
-        if kcu.is_empty_space(state_map, x, y + 1) \
-                and kcu.is_empty_space(state_map, x - 1, y + 2) \
-                and not kcu.is_our_side(state_map, x - 2, y + 3, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 2, 'to_y': y + 3})
-
-    # 대각선 왼쪽 후진 2 길 체크
-    if x > 2 and y < 8:
-        if kcu.is_empty_space(state_map, x - 1, y) \
-                and kcu.is_empty_space(state_map, x - 2, y + 1) \
-                and not kcu.is_our_side(state_map, x - 3, y + 2, side):
-            action_list.append(
-                {'from_x': x, 'from_y': y, 'to_x': x - 3, 'to_y': y + 2})
+    action_list = []
+    for first_leg, second_leg, to_square, action in MOVE_TABLE[side][square]:
+        if state_map[first_leg] == 0 and state_map[second_leg] == 0 and state_map[to_square] * side <= 0:
+            action_list.append(action)
 
     return action_list
@@ -4,46 +4,28 @@ from __future__ import division
 from __future__ import print_function
 
 from game import korean_chess_constant as kcu
+from game.korean_chess_piece import move_table
 
+MOVE_TABLE = move_table.build_step_table([
+    # 대각선 오른쪽 길
+    ((1, -1), lambda x, y: (x, y) in ((4, 1), (3, 2))),
+    # 대각선 왼쪽 길
+    ((-1, -1), lambda x, y: (x, y) in ((4, 1), (5, 2))),
+    # 전진 길
+    ((0, -1), None),
+    # 오른쪽 길
+    ((1, 0), None),
+    # 왼쪽 길
+    ((-1, 0), None),
+])
 
-def get_actions(state_map, x, y):
-    piece = state_map[y][x]
-    side = piece[0]
 
-    action_list = []
-
-    piece_type = kcu.SOLDIER
-
-    # 대각선 오른쪽 길 체크
-    if ((y == 1 and x == 4) or (y == 2 and x == 3)) and \
-            not kcu.is_our_side(state_map, x + 1, y - 1, side):
-        # and not kcu.is_losing_way(state_map, x, y, x + 1, y - 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y - 1})
-
-    # 대각선 왼쪽 길 체크
-    if ((y == 1 and x == 4) or (y == 2 and x == 5)) and \
-            not kcu.is_our_side(state_map, x - 1, y - 1, side):
-        # and not kcu.is_losing_way(state_map, x, y, x - 1, y - 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y - 1})
+def get_actions(state_map, square):
+    side = kcu.get_side(state_map[square])
 
-    # 전진 길 체크
-    if y != 0 and not kcu.is_our_side(state_map, x, y - 1, side):
-        # and not kcu.is_losing_way(state_map, x, y, x, y - 1, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x, 'to_y': y - 1})
-
-    # 오른쪽 길 체크
-    if x != 8 and not kcu.is_our_side(state_map, x + 1, y, side):
-        # and   not kcu.is_losing_way(state_map, x, y, x + 1, y, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x + 1, 'to_y': y})
-
-    # 왼쪽 길 체크
-    if x != 0 and not kcu.is_our_side(state_map, x - 1, y, side):
-        # and   not kcu.is_losing_way(state_map, x, y, x - 1, y, side):
-        action_list.append(
-            {'from_x': x, 'from_y': y, 'to_x': x - 1, 'to_y': y})
+    action_list = []
+    for to_square, action in MOVE_TABLE[side][square]:
+        if state_map[to_square] * side <= 0:
+            action_list.append(action)
 
     return action_list
@@ -2,86 +2,51 @@
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
-import copy
+from game.korean_chess_piece import attack_table
 from game.korean_chess_piece import piece_factory
+from game.korean_chess_board import Board
 from game import korean_chess_constant as c
-import numpy as np
 
-
-def reverse_state(state, is_copy=True):
-    if is_copy:
-        state = copy_state(state)
-    state.reverse()
-    reversed_state = []
-    for line in state:
-        line.reverse()
-        reversed_state.append(line)
-    return reversed_state
+# RED sees the board turned around (see move_table.get_side_xy), so its pieces are visited from the last square
+SQUARE_ORDER = {1: list(range(90)), -1: list(range(89, -1, -1))}
 
 
 def copy_state(state):
-    return copy.deepcopy(state)
+    return state.copy()
 
 
 def encode_state(state):
-    new_state = [[0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9]
-    for i, line in enumerate(state[0]):
-        for j, piece in enumerate(line):
-            if piece != 0:
-                new_state[i][j] = "b" + str(int(piece))
-            if state[1][i][j] != 0:
-                new_state[i][j] = "r" + str(int(state[1][i][j]))
-    turn = c.BLUE if state[2][0][0] == 1 else c.RED
-    return new_state, turn
+    board = Board.from_planes(state)
+    return board, board.turn
 
 
 def decode_state(state, turn):
-    new_state = [[[0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9],
-                 [[0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9, [0] * 9]]
-    for i, line in enumerate(state):
-        for j, piece in enumerate(line):
-            if piece != 0:
-                if piece[0] == c.BLUE:
-                    new_state[0][i][j] = piece[1]
-                else:
-                    new_state[1][i][j] = piece[1]
-    if turn == c.BLUE:
-        new_state.append([[1] * 9, [1] * 9, [1] * 9, [1] * 9, [1] * 9, [1] * 9, [1] * 9, [1] * 9, [1] * 9, [1] * 9])
-    else:
-        new_state.append([[-1] * 9, [-1] * 9, [-1] * 9, [-1] * 9, [-1] * 9, [-1] * 9, [-1] * 9, [-1] * 9, [-1] * 9, [-1] * 9])
-    new_state = np.array(new_state).astype(np.float)
-    return new_state
+    return state.to_planes(turn)
 
 
 def validate_action(action, state, turn, next_turn, use_check=True):
-    to_x = action['to_x']
-    to_y = action['to_y']
-    from_x = action['from_x']
-    from_y = action['from_y']
+    from_square, to_square = divmod(action, 90)
+
+    piece = state.squares[from_square]
 
     # check the piece is empty
-    if state[from_y][from_x] == 0:
+    if piece == 0:
         raise Exception("this piece is empty")
         # return False
 
     # check the piece is current turn.
-    if state[from_y][from_x][0] != turn:
+    if piece * c.SIDE_SIGN[turn] < 0:
         raise Exception("this piece is a opponent piece.")
         # return False
 
-    actions = get_actions(state, from_x, from_y, turn)
+    actions = get_actions(state, from_square % 9, from_square // 9, turn)
 
     if not actions:
         raise Exception("this piece has no any actions.")
         # return False
 
     # check there is a valid action.
-    invalid_cnt = 0
-    for tmp_action in actions:
-        if tmp_action["to_x"] != to_x or tmp_action["to_y"] != to_y:
-            invalid_cnt += 1
-
-    if invalid_cnt == len(actions):
+    if action not in actions:
         raise Exception("this action differs from any actions.")
         # return False
 
@@ -90,9 +55,10 @@ def validate_action(action, state, turn, next_turn, use_check=True):
 
     # check this action gets my own check.
     # todo: modify for oppnent turn
-    check = is_check(state, from_x, from_y, to_x, to_y, next_turn)
+    check = is_check(state, action, next_turn)
     if check:
-        raise Exception("this action causes opponent's check %d %d %d %d" % (from_x, from_y, to_x, to_y,))
+        raise Exception("this action causes opponent's check %d %d %d %d" % (
+            from_square % 9, from_square // 9, to_square % 9, to_square // 9))
         # return False
 
     return True
@@ -115,80 +81,53 @@ def check_repeat(action, action_history):
     return True
 
 
-def is_check(state, from_x, from_y, to_x, to_y, turn):
-    state = copy_state(state)
-    state[to_y][to_x] = state[from_y][from_x]
-    state[from_y][from_x] = 0
-    for y, line in enumerate(state):
-        for x, piece_num in enumerate(line):
-            if piece_num == 0 or piece_num[0] != turn:
-                continue
-            actions = get_actions(state, x, y, turn)
-            for action in actions:
-                if state[action["to_y"]][action["to_x"]] != 0 \
-                  and int(state[action["to_y"]][action["to_x"]][1]) == c.KING \
-                  and state[action["to_y"]][action["to_x"]][0] != turn:
-                    return True
-    return False
+def is_check(state, action, turn):
+    undo = state.make_move(action)
+    check = is_king_capturable(state, turn)
+    state.unmake_move(undo)
+    return check
+
+
+def is_king_capturable(state, turn):
+    squares = state.squares
+    side = c.SIDE_SIGN[turn]
+    try:
+        king_square = squares.index(-side * c.KING)
+    except ValueError:
+        return False
+    return attack_table.is_attacked(squares, king_square, side)
 
 
 def is_checkmate(state, turn):
     opponent_turn = c.RED if turn == c.BLUE else c.BLUE
     # get opponent actions
     opponent_actions = get_all_actions(state, opponent_turn)
-    state = copy_state(state)
     # check opponent's defending move
     for opponent_action in opponent_actions:
-        to_x = opponent_action['to_x']
-        to_y = opponent_action['to_y']
-        from_x = opponent_action['from_x']
-        from_y = opponent_action['from_y']
         # move opponent
-        old = state[to_y][to_x]
-        state[to_y][to_x] = state[from_y][from_x]
-        state[from_y][from_x] = 0
-        # for line in state:
-        #     print(line)
-        # get my actions after opponent's moving
-        next_my_actions = get_all_actions(state, turn)
-        # count my check
-        check_cnt = 0
-        for action in next_my_actions:
-            # print("try", action)
-            if state[action["to_y"]][action["to_x"]] != 0 and int(state[action["to_y"]][action["to_x"]][1]) == c.KING:
-                # if is_check(state, action["from_x"], action["from_y"], action["to_x"], action["to_y"], turn):
-                # print("check")
-                check_cnt += 1
-                # else:
-                #     print("not check")
-        if check_cnt == 0:
-            # print("not checkmate")
-            return False
+        undo = state.make_move(opponent_action)
+        # is the opponent king still capturable after opponent's moving
+        check = is_king_capturable(state, turn)
         # get back to previous state
-        state[from_y][from_x] = state[to_y][to_x]
-        state[to_y][to_x] = old
+        state.unmake_move(undo)
+        if not check:
+            return False
     return True
 
 
 def is_draw(state):
-    other_piece_list = []
-    for y, line in enumerate(state):
-        for x, piece in enumerate(line):
-            if piece == 0:
-                continue
-            if int(piece[1]) != c.KING and int(piece[1]) != c.GUARDIAN:
-                other_piece_list.append([x, y])
-
+    squares = state.squares
     cannon_cnt = 0
     disable_cannon_cnt = 0
-    for other_piece in other_piece_list:
-        if int(state[other_piece[1]][other_piece[0]][1]) != c.CANNON:
+    for square, piece in enumerate(squares):
+        if piece == 0 or abs(piece) == c.KING or abs(piece) == c.GUARDIAN:
+            continue
+        if abs(piece) != c.CANNON:
             return False
-        else:
-            cannon_cnt += 1
-            actions = get_actions(state, other_piece[0], other_piece[1], state[other_piece[1]][other_piece[0]][0])
-            if not actions:
-                disable_cannon_cnt += 1
+        cannon_cnt += 1
+        actions = get_actions(state, square % 9, square // 9, c.BLUE if piece > 0 else c.RED)
+        if not actions:
+            disable_cannon_cnt += 1
 
     if cannon_cnt == disable_cannon_cnt:
         return True
@@ -206,30 +145,70 @@ def reverse_actions(actions):
 
 
 def get_all_actions(state, turn):
-    if turn == c.RED:
-        state = reverse_state(state)
+    squares = state.squares
+    side = c.SIDE_SIGN[turn]
     actions = []
-    for y, line in enumerate(state):
-        for x, piece_num in enumerate(line):
-            if piece_num == 0 or piece_num[0] != turn:
-                continue
-
-            piece = piece_factory.get_piece(int(piece_num[1]))
-            actions += piece.get_actions(state, x, y)
-    if turn == c.RED:
-        return reverse_actions(actions)
+    for square in SQUARE_ORDER[side]:
+        piece_num = squares[square] * side
+        if piece_num <= 0:
+            continue
+
+        piece = piece_factory.get_piece(piece_num)
+        actions += piece.get_actions(squares, square)
     return actions
 
 
+def get_legal_actions(state, turn):
+    """Returns the actions of get_all_actions which don't leave the own king capturable.
+
+    Out of check only king moves and moves touching a check square (see attack_table.get_check_squares) can
+    expose the king, so just those are verified with make/unmake. In check every action is verified.
+    """
+    actions = get_all_actions(state, turn)
+    squares = state.squares
+    side = c.SIDE_SIGN[turn]
+    try:
+        king_square = squares.index(side * c.KING)
+    except ValueError:
+        return actions
+    if attack_table.is_attacked(squares, king_square, -side):
+        check_squares = None
+    else:
+        check_squares = attack_table.get_check_squares(squares, king_square, -side)
+
+    legal_actions = []
+    for action in actions:
+        from_square, to_square = divmod(action, 90)
+        if check_squares is not None and from_square != king_square \
+                and from_square not in check_squares and to_square not in check_squares:
+            legal_actions.append(action)
+            continue
+        undo = state.move_piece(from_square, to_square)
+        is_attacked = attack_table.is_attacked(squares, to_square if from_square == king_square else king_square,
+                                               -side)
+        state.unmake_move(undo)
+        if not is_attacked:
+            legal_actions.append(action)
+    return legal_actions
+
+
 def get_actions(state, x, y, turn):
-    if state[y][x] == 0 or state[y][x][0] != turn:
+    piece_num = state.squares[y * 9 + x] * c.SIDE_SIGN[turn]
+    if piece_num <= 0:
         return None
-    piece = piece_factory.get_piece(int(state[y][x][1]))
-    if turn == c.RED:
-        state = reverse_state(state)
-        x = 8 - x
-        y = 9 - y
-    actions = piece.get_actions(state, x, y)
-    if turn == c.RED:
-        return reverse_actions(actions)
-    return actions
+    piece = piece_factory.get_piece(piece_num)
+    return piece.get_actions(state.squares, y * 9 + x)
+
+
+def build_action(from_x, from_y, to_x, to_y):
+    return c.build_action(from_y * 9 + from_x, to_y * 9 + to_x)
+
+
+def action_from_dict(action):
+    """Packs a {'from_x', 'from_y', 'to_x', 'to_y'} dict (user input, recorded games) into an action."""
+    return build_action(action["from_x"], action["from_y"], action["to_x"], action["to_y"])
+
+
+def action_to_dict(action):
+    from_square, to_square = divmod(action, 90)
+    return {'from_x': from_square % 9, 'from_y': from_square // 9, 'to_x': to_square % 9, 'to_y': to_square // 9}
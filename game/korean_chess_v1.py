@@ -9,6 +9,8 @@ import time
 
 from game import korean_chess_constant as c
 from game import korean_chess_util as u
+from game.korean_chess_board import Board
+from util.cache import LruCache
 from colorama import Fore
 from sys import platform
 import numpy as np
@@ -119,11 +121,15 @@ class KoreanChessV1:
         self.print_mcts_history = None
         self.use_color_print = None
         self.action_history = []
-        self.use_cache = False
-        self.action_cache = {}
-        self.simulation_cache = {}
-        self.over_cache = {}
+        self.use_cache = True
+        self.cache_capacity = 20000
+        if properties and "cache_capacity" in properties:
+            self.cache_capacity = properties["cache_capacity"]
+        self.action_cache = LruCache(self.cache_capacity)
+        self.simulation_cache = LruCache(self.cache_capacity)
+        self.over_cache = LruCache(self.cache_capacity)
         self.validate_action = True
+        self.use_legal_actions = False
         self.limit_action_history = None
 
     def reset(self):
@@ -154,6 +160,8 @@ class KoreanChessV1:
                 self.use_cache = self.properties["use_cache"]
             if "validate_action" in self.properties:
                 self.validate_action = self.properties["validate_action"]
+            if "use_legal_actions" in self.properties:
+                self.use_legal_actions = self.properties["use_legal_actions"]
 
         self.limit_action_history = self.limit_repeat + (self.limit_repeat - 2)
         if self.properties and "init_state" in self.properties:
@@ -174,15 +182,8 @@ class KoreanChessV1:
             self.next_turn = c.RED
 
             # setting state
-            current_state = copy.deepcopy(KoreanChessV1.default_state)
-            for i, position_type in enumerate(position_type_list):
-                if not KoreanChessV1.POSITION_TYPE_LIST[position_type]:
-                    raise Exception('position_type is invalid : ' + str(position_type))
-
-                line_idx = -1 if i == 0 else 0
-
-                current_state[line_idx] = copy.deepcopy(KoreanChessV1.POSITION_TYPE_LIST[position_type][i])
-            self.current_state = current_state
+            current_state = KoreanChessV1.build_position_state(position_type_list)
+            self.current_state = Board.from_state(current_state, self.current_turn)
 
         # set scores
         self.blue_score = c.get_score(self.current_state, self.current_turn)
@@ -194,6 +195,19 @@ class KoreanChessV1:
 
         return u.decode_state(self.current_state, self.current_turn)
 
+    @staticmethod
+    def build_position_state(position_type_list):
+        """Start state of [blue position type, red position type], indexes of POSITION_TYPE_LIST."""
+        state = copy.deepcopy(KoreanChessV1.default_state)
+        for i, position_type in enumerate(position_type_list):
+            if not KoreanChessV1.POSITION_TYPE_LIST[position_type]:
+                raise Exception('position_type is invalid : ' + str(position_type))
+
+            line_idx = -1 if i == 0 else 0
+
+            state[line_idx] = copy.deepcopy(KoreanChessV1.POSITION_TYPE_LIST[position_type][i])
+        return state
+
     def step(self, action):
         # validate action
         if self.validate_action:
@@ -205,20 +219,20 @@ class KoreanChessV1:
         self.action_history.append(action)
         if len(self.action_history) > self.limit_action_history:
             self.action_history = self.action_history[-self.limit_action_history:]
-        to_x = action['to_x']
-        to_y = action['to_y']
-        from_x = action['from_x']
-        from_y = action['from_y']
+        to_square = action % 90
+        to_x = to_square % 9
+        to_y = to_square // 9
 
         # check? 장군
         if self.use_check:
-            is_check = u.is_check(self.current_state, from_x, from_y, to_x, to_y, self.current_turn)
+            is_check = u.is_check(self.current_state, action, self.current_turn)
         else:
             is_check = False
 
         # reward
-        to_piece = self.current_state[to_y][to_x]
-        reward = 0 if to_piece == 0 else c.REWARD_LIST[int(to_piece[1])]
+        squares = self.current_state.squares
+        to_piece = squares[to_square]
+        reward = 0 if to_piece == 0 else c.REWARD_LIST[abs(to_piece)]
         if reward > 0 and reward < c.REWARD_LIST[c.KING]:
             if self.current_turn == c.BLUE:
                 self.blue_catch_list.append(to_piece)
@@ -228,8 +242,7 @@ class KoreanChessV1:
                 self.blue_score -= reward
 
         # move
-        self.current_state[to_y][to_x] = self.current_state[from_y][from_x]
-        self.current_state[from_y][from_x] = 0
+        self.current_state.make_move(action)
         self.current_step += 1
 
         # checkmate?
@@ -288,6 +301,11 @@ class KoreanChessV1:
 
         return u.decode_state(self.current_state, self.current_turn), reward, is_game_over, info
 
+    def get_no_action_info(self):
+        """Info of a game which ends because the current turn has no legal action, the next turn wins."""
+        return {"is_check": u.is_king_capturable(self.current_state, self.next_turn), "over_limit_step": False,
+                "is_draw": False, "winner": self.next_turn}
+
     def get_winner_by_point(self, state):
         state, _ = self.encode_state(state)
         red_score = c.get_score(state, c.RED)
@@ -310,6 +328,7 @@ class KoreanChessV1:
                 return
             by_mcts = True
             state, turn = u.encode_state(state)
+        state = state.to_state()
         if self.interval > 0:
             time.sleep(self.interval)
         if turn == c.BLUE:
@@ -351,28 +370,55 @@ class KoreanChessV1:
 
         print('======================================================')
 
-    def build_cache_key(self, state, turn, action=None):
+    def build_cache_key(self, state_hash, action=None):
         if action is None:
-            return str(state) + turn
+            return state_hash
         else:
-            return str(state) + turn + str(action["from_x"]) + str(action["from_y"]) + str(action["to_x"]) + str(
-                action["to_y"])
+            return state_hash, action
 
-    def get_all_actions(self, state=None):
-        if state is not None:
-            state, turn = u.encode_state(state)
+    def get_state_hash(self, state):
+        return self.to_board(state).hash
+
+    def get_board(self, state):
+        """Native engine state of planes, searches keep it instead of the planes."""
+        board, _ = u.encode_state(state)
+        return board
+
+    def get_planes(self, board):
+        return u.decode_state(board, board.turn)
+
+    def to_board(self, state):
+        return state if isinstance(state, Board) else self.get_board(state)
+
+    def get_all_actions(self, state=None, state_hash=None):
+        # state is planes or a Board, the current state if not given
+        board = None
+        if state is None:
+            board = self.current_state
+            state_hash = board.hash
+        elif state_hash is None:
+            board = self.to_board(state)
+            state_hash = board.hash
+        cache_key = self.build_cache_key(state_hash)
+        if self.use_cache:
+            all_actions = self.action_cache.get(cache_key)
+            if all_actions is not None:
+                return list(all_actions)
+        if board is None:
+            board = self.to_board(state)
+        if self.use_legal_actions:
+            all_actions = u.get_legal_actions(board, board.turn)
         else:
-            state = self.current_state
-            turn = self.current_turn
-        # cache_key = self.build_cache_key(state, turn)
-        # if self.use_cache and cache_key in self.action_cache:
-        #     return self.action_cache[cache_key]
-        all_actions = u.get_all_actions(state, turn)
+            all_actions = u.get_all_actions(board, board.turn)
+
+        if self.use_cache:
+            self.action_cache.put(cache_key, all_actions)
 
-        # if self.use_cache:
-        #     self.action_cache[cache_key] = all_actions
+        return list(all_actions)
 
-        return all_actions
+    def get_cache_stats(self):
+        return {"action": self.action_cache.get_stats(), "simulation": self.simulation_cache.get_stats(),
+                "over": self.over_cache.get_stats()}
 
     def check_repeat(self, action, action_history=None):
         if self.limit_repeat < 2:
@@ -388,75 +434,91 @@ class KoreanChessV1:
         return u.check_repeat(action, action_history)
 
     def encode_action(self, action):
-        action_from = action["from_y"] * 9 + action["from_x"]
-
-        action_to = action["to_y"] * 9 + action["to_x"]
-        return [action_from, action_to]
-
-    def is_over(self, state):
-        state, turn = u.encode_state(state)
-        cache_key = self.build_cache_key(state, turn)
-        if self.use_cache and cache_key in self.over_cache:
-            return self.over_cache[cache_key]
-        num_kings = 0
-        for line in state:
-            for piece in line:
-                if piece != 0 and int(piece[1]) == c.KING:
-                    num_kings += 1
-                    if num_kings == 2:
-                        if self.use_cache:
-                            self.over_cache[cache_key] = False
-                        return False
-        if self.use_cache:
-            self.over_cache[cache_key] = True
-        return True
-
-    def simulate(self, state, action, return_info=True):
-        state, turn = u.encode_state(state)
-        # cache_key = self.build_cache_key(state, turn, action)
-        # if self.use_cache and cache_key in self.simulation_cache:
-        #     if return_info:
-        #         return self.simulation_cache[cache_key][0], self.simulation_cache[cache_key][1]
-        #     else:
-        #         return self.simulation_cache[cache_key][0]
-
-        turn = c.RED if turn == c.BLUE else c.BLUE
-        to_x = action['to_x']
-        to_y = action['to_y']
-        from_x = action['from_x']
-        from_y = action['from_y']
-        reward = 0
-        if state[to_y][to_x] != 0:
-            reward = c.REWARD_LIST[int(state[to_y][to_x][1])]
+        # (from square, to square), works for numpy arrays of actions as well
+        return divmod(action, 90)
 
-        state[to_y][to_x] = state[from_y][from_x]
-        state[from_y][from_x] = 0
-        decode_state = u.decode_state(state, turn)
+    def action_from_dict(self, action):
+        return u.action_from_dict(action)
 
-        if return_info:
-            is_game_over = False
-            if reward > 0:
-                if reward == c.REWARD_LIST[c.KING]:
-                    reward = 1.
-                    is_game_over = True
-                else:
-                    # reward /= (c.REWARD_LIST[c.CAR] * 2)
-                    reward /= (c.REWARD_LIST[c.KING] * 2)
+    def action_to_dict(self, action):
+        return u.action_to_dict(action)
 
-            info = {"is_game_over": is_game_over, "reward": reward}
+    def is_over(self, state, state_hash=None):
+        board = None
+        if state_hash is None:
+            board = self.to_board(state)
+            state_hash = board.hash
+        cache_key = self.build_cache_key(state_hash)
+        if self.use_cache:
+            is_over = self.over_cache.get(cache_key)
+            if is_over is not None:
+                return is_over
+        if board is None:
+            board = self.to_board(state)
+        is_over = c.KING not in board.squares or -c.KING not in board.squares
+        if self.use_cache:
+            self.over_cache.put(cache_key, is_over)
+        return is_over
+
+    def simulate(self, state, action, return_info=True, state_hash=None):
+        board = None
+        if state_hash is None:
+            board, _ = u.encode_state(state)
+            state_hash = board.hash
+        cache_key = self.build_cache_key(state_hash, action)
+        simulation = self.simulation_cache.get(cache_key) if self.use_cache else None
+        if simulation is None:
+            if board is None:
+                board, _ = u.encode_state(state)
+            undo = board.make_move(action)
+            simulation = (u.decode_state(board, board.turn), self.build_simulation_info(undo[2], board.hash))
+            if self.use_cache:
+                self.simulation_cache.put(cache_key, simulation)
 
-            return decode_state, info
+        if return_info:
+            return simulation[0], simulation[1]
         else:
-            return decode_state
+            return simulation[0]
+
+    def simulate_board(self, board, action):
+        """Native counterpart of simulate, returns (next board, info) of action from board.
+
+        The boards are Board objects (see get_board), no planes are built so it needs no cache.
+        """
+        next_board = board.copy()
+        undo = next_board.make_move(action)
+        return next_board, self.build_simulation_info(undo[2], next_board.hash)
+
+    def get_action_rewards(self, board, actions):
+        """Capture rewards of actions from board (see get_capture_reward), read from the squares the actions move to
+        without making any move."""
+        squares = board.squares
+        return [self.get_capture_reward(squares[action % 90]) for action in actions]
+
+    def build_simulation_info(self, captured_piece, state_hash):
+        reward = self.get_capture_reward(captured_piece)
+        is_game_over = abs(captured_piece) == c.KING
+
+        return {"is_game_over": is_game_over, "reward": reward, "state_hash": state_hash}
+
+    @staticmethod
+    def get_capture_reward(captured_piece):
+        reward = 0
+        if captured_piece != 0:
+            reward = c.REWARD_LIST[abs(captured_piece)]
+            if reward == c.REWARD_LIST[c.KING]:
+                reward = 1.
+            else:
+                # reward /= (c.REWARD_LIST[c.CAR] * 2)
+                reward /= (c.REWARD_LIST[c.KING] * 2)
+        return reward
 
     def convert_action_probs_to_policy_probs(self, actions, action_probs):
-        policy_probs = np.array([.0] * 90)
-        for i, prob in enumerate(action_probs):
-            action = actions[i]
-            action = self.encode_action(action)
-            half_prob = prob / 2
-            policy_probs[action[0]] += half_prob
-            policy_probs[action[1]] += half_prob
+        policy_probs = np.zeros(90)
+        from_squares, to_squares = self.encode_action(np.asarray(actions))
+        half_probs = np.asarray(action_probs, dtype=np.float64) / 2
+        np.add.at(policy_probs, from_squares, half_probs)
+        np.add.at(policy_probs, to_squares, half_probs)
         policy_probs = policy_probs / policy_probs.sum()
         return list(policy_probs)
 
@@ -53,12 +53,14 @@ for n, line in enumerate(f):
         action["from_y"] = action["y"]
         if i % 2 == 1:
             [action] = korean_chess_util.reverse_actions([action])
+        action = env.action_from_dict(action)
         turn = "r" if i % 2 == 0 else "b"
 
-        state[action["to_y"]][action["to_x"]] = state[action["from_y"]][action["from_x"]]
-        state[action["from_y"]][action["from_x"]] = 0
+        from_square, to_square = env.encode_action(action)
+        state.squares[to_square] = state.squares[from_square]
+        state.squares[from_square] = 0
 
-        print(i, action)
+        print(i, env.action_to_dict(action))
         first_state, reward, done, info = env.step(action)
         if info is False:
             break
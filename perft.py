@@ -0,0 +1,13 @@
+import sys
+import tensorflow as tf
+from game import korean_chess_perft
+
+FLAGS = tf.app.flags.FLAGS
+
+tf.app.flags.DEFINE_integer('depth', 3, "perft depth")
+tf.app.flags.DEFINE_string('positions', None, "comma separated position names, every position if not given")
+tf.app.flags.DEFINE_boolean('use_legal_actions', False, "count only actions not leaving the king capturable")
+
+names = FLAGS.positions.split(",") if FLAGS.positions else None
+if korean_chess_perft.run(FLAGS.depth, names, FLAGS.use_legal_actions) > 0:
+    sys.exit("perft differs from the reference counts")
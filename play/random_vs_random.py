@@ -21,9 +21,7 @@ for i in range(episodes):
         actions = env.get_all_actions()
         action = actions[random.randint(0, len(actions) - 1)]
         try:
-            new_state, reward, done, _ = env.step(
-                {"from_x": action["from_x"], "from_y": action["from_y"], "to_x": action["to_x"],
-                 "to_y": action["to_y"]})
+            new_state, reward, done, _ = env.step(action)
             if done:
                 print("The End")
                 break
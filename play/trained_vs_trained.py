@@ -38,9 +38,7 @@ new_state = env.reset()
 while True:
     action = actor.choose_action(new_state, env, True)
     try:
-        new_state, reward, done, _ = env.step(
-            {"from_x": action["from_x"], "from_y": action["from_y"], "to_x": action["to_x"],
-             "to_y": action["to_y"]})
+        new_state, reward, done, _ = env.step(action)
         if done:
             print("The End")
             break
@@ -22,7 +22,8 @@ while True:
         from_x, from_y, to_x, to_y = user_input.get_user_input()
 
         try:
-            new_state, reward, done, _ = env.step({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
+            user_action = env.action_from_dict({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
+            new_state, reward, done, _ = env.step(user_action)
             if reward is False:
                 print("repeat!!")
                 continue
@@ -38,9 +39,7 @@ while True:
         actions = env.get_all_actions()
         action = actions[random.randint(0, len(actions) - 1)]
         try:
-            new_state, reward, done, _ = env.step(
-                {"from_x": action["from_x"], "from_y": action["from_y"], "to_x": action["to_x"],
-                 "to_y": action["to_y"]})
+            new_state, reward, done, _ = env.step(action)
             if done:
                 print("The End")
                 break
@@ -39,7 +39,8 @@ while True:
         from_x, from_y, to_x, to_y = user_input.get_user_input()
 
         try:
-            new_state, reward, done, _ = env.step({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
+            user_action = env.action_from_dict({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
+            new_state, reward, done, _ = env.step(user_action)
 
             if done:
                 print("The End")
@@ -52,9 +53,7 @@ while True:
     else:
         action = actor.choose_action(new_state, env, True)
         try:
-            new_state, reward, done, _ = env.step(
-                {"from_x": action["from_x"], "from_y": action["from_y"], "to_x": action["to_x"],
-                 "to_y": action["to_y"]})
+            new_state, reward, done, _ = env.step(action)
             if done:
                 print("The End")
                 break
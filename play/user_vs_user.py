@@ -19,7 +19,8 @@ for i in range(100):
     from_x, from_y, to_x, to_y = user_input.get_user_input()
 
     try:
-        new_state, reward, done, _ = env.step({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
+        user_action = env.action_from_dict({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
+        new_state, reward, done, _ = env.step(user_action)
 
         if done:
             print("The End")
@@ -15,13 +15,14 @@ common.make_dirs(os.path.join(FLAGS.save_dir, "dataset_ready"))
 
 env = Game.make("KoreanChess-v1",
                 {"use_check": False, "limit_step": FLAGS.max_step, "print_mcts_history": FLAGS.print_mcts_history,
-                 "use_color_print": FLAGS.use_color_print, "use_cache": FLAGS.use_cache})
+                 "use_color_print": FLAGS.use_color_print, "use_cache": FLAGS.use_cache,
+                 "cache_capacity": FLAGS.cache_capacity, "use_legal_actions": FLAGS.use_legal_actions})
 
 config = tf.ConfigProto()
 config.gpu_options.allow_growth = True
 sess = tf.Session(config=config)
 model = Model(sess, weight_decay=FLAGS.weight_decay, momentum=FLAGS.momentum, num_layers=FLAGS.num_model_layers,
-              use_cache=FLAGS.use_cache, conf=FLAGS)
+              use_cache=FLAGS.use_cache, cache_capacity=FLAGS.cache_capacity, conf=FLAGS)
 sess.run(tf.global_variables_initializer())
 saver = tf.train.Saver()
 
@@ -29,6 +30,7 @@ ds = Dataset(sess)
 
 while True:
     common.restore_model(FLAGS.save_dir, "best_model.ckpt", saver, sess)
+    model.clear_cache()
     now = common.now_date_str_nums()
     dataset_path = os.path.join(FLAGS.save_dir, ("dataset_%s_%s.csv" % (now, uuid.uuid4())))
     ds.open(dataset_path)
@@ -42,7 +44,9 @@ while True:
                                                            FLAGS.c_puct, FLAGS.exploration_step, FLAGS.reuse_mcts,
                                                            FLAGS.print_mcts_tree, FLAGS.num_state_history,
                                                            use_reward_mcts=FLAGS.use_reward_mcts,
-                                                           begin_temperature=FLAGS.begin_temperature)
+                                                           begin_temperature=FLAGS.begin_temperature,
+                                                           use_array_mcts=FLAGS.use_array_mcts,
+                                                           mcts_options=common.get_mcts_options(FLAGS))
 
         if info["winner"]:
             game_results[info["winner"]] += 1
@@ -50,6 +54,10 @@ while True:
             game_results["d"] += 1
         common.log(
             "Blue wins : %d, Red wins : %d, Draws : %d" % (game_results["b"], game_results["r"], game_results["d"]))
+        if FLAGS.use_cache:
+            for cache_name, cache_stats in env.get_cache_stats().items():
+                common.log("%s cache : %s" % (cache_name, cache_stats))
+            common.log("inference cache : %s" % model.get_cache_stats())
         """"""
         """save self-play data"""
         if info["winner"]:
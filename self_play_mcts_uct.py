@@ -15,7 +15,8 @@ common.set_flags()
 
 env = Game.make("KoreanChess-v1",
                 {"use_check": False, "limit_step": FLAGS.max_step, "use_color_print": FLAGS.use_color_print,
-                 "use_cache": FLAGS.use_cache})
+                 "use_cache": FLAGS.use_cache, "cache_capacity": FLAGS.cache_capacity,
+                 "use_legal_actions": FLAGS.use_legal_actions})
 
 mcts = MctsUct(env, FLAGS.max_simulation)
 state = env.reset()
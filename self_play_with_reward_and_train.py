@@ -14,14 +14,15 @@ common.set_flags()
 
 env = Game.make("KoreanChess-v1",
                 {"use_check": False, "limit_step": FLAGS.max_step, "print_mcts_history": FLAGS.print_mcts_history,
-                 "use_color_print": FLAGS.use_color_print, "use_cache": FLAGS.use_cache})
+                 "use_color_print": FLAGS.use_color_print, "use_cache": FLAGS.use_cache,
+                 "cache_capacity": FLAGS.cache_capacity, "use_legal_actions": FLAGS.use_legal_actions})
 
 config = tf.ConfigProto()
 config.gpu_options.allow_growth = True
 sess = tf.Session(config=config)
 writer = tf.summary.FileWriter(FLAGS.save_dir + '/summary', sess.graph)
 model = Model(sess, weight_decay=FLAGS.weight_decay, momentum=FLAGS.momentum, num_layers=FLAGS.num_model_layers,
-              use_cache=FLAGS.use_cache, conf=FLAGS)
+              use_cache=FLAGS.use_cache, cache_capacity=FLAGS.cache_capacity, conf=FLAGS)
 sess.run(tf.global_variables_initializer())
 saver = tf.train.Saver()
 learning_rate = FLAGS.learning_rate
@@ -51,6 +52,10 @@ for episode in range(FLAGS.max_episode):
     else:
         game_results["d"] += 1
     common.log("Blue wins : %d, Red winds : %d, Draws : %d" % (game_results["b"], game_results["r"], game_results["d"]))
+    if FLAGS.use_cache:
+        for cache_name, cache_stats in env.get_cache_stats().items():
+            common.log("%s cache : %s" % (cache_name, cache_stats))
+        common.log("inference cache : %s" % model.get_cache_stats())
     """"""
     """save self-play data"""
     if info["winner"]:
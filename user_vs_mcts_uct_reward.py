@@ -26,7 +26,7 @@ while True:
 
         try:
             legal_actions = env.get_all_actions()
-            user_action = {"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y}
+            user_action = env.action_from_dict({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
             state, reward, done, _ = env.step(user_action)
 
             for j, legal_action in enumerate(legal_actions):
@@ -42,7 +42,7 @@ while True:
             traceback.print_exc()
             continue
     else:
-        action = mcts.search(state, env.current_turn)
+        action = mcts.search(state, env.current_turn, FLAGS.time_budget_ms or None)
 
         state, reward, done, info = env.step(action)
         if done:
@@ -37,7 +37,7 @@ while True:
 
         try:
             legal_actions = env.get_all_actions()
-            user_action = {"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y}
+            user_action = env.action_from_dict({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
             new_state, reward, done, _ = env.step(user_action)
 
             for j, legal_action in enumerate(legal_actions):
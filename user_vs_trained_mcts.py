@@ -2,6 +2,7 @@
 import tensorflow as tf
 from game.game import Game
 from core.mcts import Mcts
+from core.mcts_root_parallel import RootParallelMcts
 from util import common
 from util import user_input
 from core.model import Model
@@ -13,6 +14,7 @@ FLAGS = tf.app.flags.FLAGS
 
 common.set_flags()
 tf.app.flags.DEFINE_integer('max_rollouts', 20, "exploration step")
+tf.app.flags.DEFINE_integer('num_root_processes', 1, "processes searching their own mcts tree from the same root")
 
 env = Game.make("KoreanChess-v1", {"use_check": False, "limit_step": FLAGS.max_step,
                                    "print_mcts_history": FLAGS.print_mcts_history,
@@ -21,15 +23,27 @@ state = env.reset()
 i = 0
 user_action_idx = -1
 
-config = tf.ConfigProto()
-config.gpu_options.allow_growth = True
-sess = tf.Session(config=config)
-model = Model(sess, weight_decay=FLAGS.weight_decay, momentum=FLAGS.momentum, num_layers=FLAGS.num_model_layers, conf=FLAGS)
-sess.run(tf.global_variables_initializer())
-saver = tf.train.Saver()
 
-checkpoint_path = common.restore_model(FLAGS.save_dir, FLAGS.model_file_name, saver, sess, False)
-mcts = Mcts(state, env, model, FLAGS.max_simulation, c_puct=FLAGS.c_puct, init_root_edges=True)
+def build_model():
+    config = tf.ConfigProto()
+    config.gpu_options.allow_growth = True
+    sess = tf.Session(config=config)
+    model = Model(sess, weight_decay=FLAGS.weight_decay, momentum=FLAGS.momentum, num_layers=FLAGS.num_model_layers,
+                  conf=FLAGS)
+    sess.run(tf.global_variables_initializer())
+    saver = tf.train.Saver()
+
+    common.restore_model(FLAGS.save_dir, FLAGS.model_file_name, saver, sess, False)
+    return model
+
+
+if FLAGS.num_root_processes > 1:
+    # the workers build their own sessions, so they are forked before this process touches tensorflow
+    mcts = RootParallelMcts(state, env, build_model, FLAGS.num_root_processes, max_simulation=FLAGS.max_simulation,
+                            c_puct=FLAGS.c_puct, init_root_edges=True, **common.get_mcts_options(FLAGS))
+else:
+    mcts = Mcts(state, env, build_model(), FLAGS.max_simulation, c_puct=FLAGS.c_puct, init_root_edges=True,
+                **common.get_mcts_options(FLAGS))
 action_list = []
 while True:
     if i % 2 == 0:
@@ -37,7 +51,7 @@ while True:
 
         try:
             legal_actions = env.get_all_actions()
-            user_action = {"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y}
+            user_action = env.action_from_dict({"from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y})
             new_state, reward, done, _ = env.step(user_action)
 
             for j, legal_action in enumerate(legal_actions):
@@ -56,7 +70,7 @@ while True:
     else:
         start_time = time.time()
         actions = env.get_all_actions()
-        action_probs = mcts.search(0, action_list[-2:])
+        action_probs = mcts.search(0, action_list[-2:], FLAGS.time_budget_ms or None)
         if len(actions) != len(action_probs):
             print("legal actions", len(actions), "mcts actions", len(action_probs))
             print("legal state")
@@ -64,7 +78,7 @@ while True:
             sys.exit("error!!! action count!!")
         action_idx = mcts.get_action_idx(action_probs)
         action = actions[action_idx]
-        print("elased time : %f" % (time.time() - start_time))
+        print("elased time : %f, %d simulations" % (time.time() - start_time, mcts.num_simulations))
         if FLAGS.print_mcts_tree:
             mcts.print_tree()
         try:
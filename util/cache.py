@@ -0,0 +1,60 @@
+import hashlib
+from collections import OrderedDict
+
+
+class LruCache(object):
+    """Dict-like cache holding at most capacity entries, the least recently used entry is evicted first.
+
+    get/put count hits, misses and evictions so long running workers can report how useful the cache is.
+    """
+
+    def __init__(self, capacity=20000):
+        if capacity < 1:
+            raise Exception("cache capacity must be positive : %s" % capacity)
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            del self.entries[key]
+        elif len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = value
+
+    def clear(self):
+        self.entries.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total > 0 else .0
+
+    def get_stats(self):
+        return {"size": len(self.entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hit_rate()}
+
+
+def get_array_key(array):
+    """Digest of the bytes of a numpy array, a short cache key for a large array like a model input."""
+    return hashlib.md5(array.tobytes()).digest()
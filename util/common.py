@@ -5,6 +5,7 @@ import time
 import tensorflow as tf
 import time
 import numpy as np
+from util.history_planes import HistoryPlanes
 
 num_opt_games = 1000
 num_eval_games = 300
@@ -34,6 +35,22 @@ def restore_model(save_dir, model_file_name, saver, sess, restore_pending=False)
     return checkpoint_path
 
 
+def get_mcts_options(flags):
+    """Keyword arguments of core.mcts.Mcts set by the flags, empty while every option is left at its default."""
+    options = {}
+    if flags.num_parallel_leaves > 1:
+        options["num_parallel_leaves"] = flags.num_parallel_leaves
+    if flags.num_search_threads > 1:
+        options["num_search_threads"] = flags.num_search_threads
+    if flags.use_transposition_table:
+        options["use_transposition_table"] = True
+    if flags.max_mcts_nodes > 0:
+        options["max_nodes"] = flags.max_mcts_nodes
+    if flags.mcts_early_stop:
+        options["early_stop"] = True
+    return options
+
+
 def log(msg):
     dt = now_date_str()
     print("[%s] %s" % (dt, msg))
@@ -63,8 +80,20 @@ def set_flags():
     tf.app.flags.DEFINE_boolean('print_mcts_tree', False, "show mcts search tree")
     tf.app.flags.DEFINE_boolean('print_mcts_search', False, "show mcts search")
     tf.app.flags.DEFINE_boolean('use_color_print', False, "use color in printing state")
-    tf.app.flags.DEFINE_boolean('use_cache', False, "use cache")
+    tf.app.flags.DEFINE_boolean('use_cache', True, "use cache")
+    tf.app.flags.DEFINE_integer('cache_capacity', 20000, "max entries in each engine cache and in the inference cache")
+    tf.app.flags.DEFINE_boolean('use_legal_actions', False, "generate only actions not leaving the king capturable")
     tf.app.flags.DEFINE_boolean('use_reward_mcts', True, "use use_reward_mcts")
+    tf.app.flags.DEFINE_boolean('use_array_mcts', False, "use the numpy struct-of-arrays mcts (core/mcts_array.py)")
+    tf.app.flags.DEFINE_integer('num_parallel_leaves', 1,
+                                "leaves selected with virtual loss and evaluated in one batch per mcts round")
+    tf.app.flags.DEFINE_integer('num_search_threads', 1, "threads running simulations on one shared mcts tree")
+    tf.app.flags.DEFINE_boolean('use_transposition_table', False, "share the mcts nodes of transposed positions")
+    tf.app.flags.DEFINE_integer('max_mcts_nodes', 0, "node budget of a reused mcts tree, 0 for no budget")
+    tf.app.flags.DEFINE_boolean('mcts_early_stop', False,
+                                "stop a mcts search once the rest of its simulations can't change its move")
+    tf.app.flags.DEFINE_integer('time_budget_ms', 0,
+                                "milliseconds of an interactive search, 0 for max_simulation simulations")
     tf.app.flags.DEFINE_boolean('reuse_mcts', True, "reuse mcts")
     tf.app.flags.DEFINE_boolean('backup_dataset', False, "backup_dataset")
     tf.app.flags.DEFINE_float('begin_temperature', 1., "begin_temperature")
@@ -158,21 +187,11 @@ def set_flags():
 
 
 def convert_state_history_to_model_input(state_history, num_state_history=7):
-    blue_history = []
-    red_history = []
-    if len(state_history) <= num_state_history:
-        for i in range(num_state_history - len(state_history) + 1):
-            blue_history.append([[0] * 9 for _ in range(10)])
-            red_history.append([[0] * 9 for _ in range(10)])
-    for state in state_history:
-        blue_history.append(state[0])
-        red_history.append(state[1])
-
-    new_state_history = blue_history + red_history
-    new_state_history = (np.array(new_state_history) / 7).tolist()
-    new_state_history.append(state_history[-1][2])
-    new_state_history = np.transpose(np.array(new_state_history), [1, 2, 0])
-    return new_state_history
+    # the last num_state_history + 1 states, see HistoryPlanes
+    history_planes = HistoryPlanes(num_state_history)
+    for state in state_history[-(num_state_history + 1):]:
+        history_planes.push(state)
+    return history_planes.get_model_input()
 
 
 def now_date_str_nums():
@@ -6,7 +6,7 @@ import time
 import datetime
 import shutil
 import csv
-from util import common
+from util.history_planes import HistoryPlanes
 import sys
 
 
@@ -50,16 +50,14 @@ class Dataset(object):
         else:
             values["b"] = -win_value
             values["r"] = win_value
+        history_planes = HistoryPlanes(num_state_history)
         for i in range(len(state_history)):
             if i % 2 == 0:
                 value = values["b"]
             else:
                 value = values["r"]
-            start_idx = 0 if i - num_state_history < 0 else i - num_state_history
-            end_idx = i + 1
-            history = state_history[start_idx:end_idx]
-            new_state_history = common.convert_state_history_to_model_input(history, num_state_history)
-            new_state_history = new_state_history.tolist()
+            history_planes.push(state_history[i])
+            new_state_history = history_planes.get_model_input().tolist()
             self.csv_writer.writerow([value, json.dumps(new_state_history), json.dumps(mcts_history[i])])
 
     def make_dataset(self, filenames, batch_size, shuffle_buffer_size=100, num_dataset_parallel=4):
@@ -0,0 +1,53 @@
+import numpy as np
+
+# piece planes hold the piece codes 1 to 7, the model sees them divided by 7
+MAX_PIECE_CODE = 7.
+
+
+class HistoryPlanes(object):
+    """Ring buffer of the piece planes of the last num_state_history + 1 positions, the model input history.
+
+    Every position is written twice, at slot i and at slot i + size, so the positions from the oldest to the newest
+    are always the slots [start, start + size) of the buffer and get_model_input builds the input with one copy of
+    that slice. The positions before the first pushed one are zero planes, like convert_state_history_to_model_input
+    pads a short history.
+    """
+
+    def __init__(self, num_state_history=7, height=10, width=9):
+        self.size = num_state_history + 1
+        # [y, x, blue or red, slot], the layout of the history planes of the model input
+        self.piece_planes = np.zeros((height, width, 2, self.size * 2), dtype=np.float32)
+        self.turn_plane = np.zeros((height, width), dtype=np.float32)
+        self.start = 0
+
+    def clear(self):
+        self.piece_planes.fill(0)
+        self.turn_plane.fill(0)
+        self.start = 0
+
+    def copy_from(self, history_planes):
+        """Makes this buffer hold the positions of history_planes, a buffer of the same shape."""
+        np.copyto(self.piece_planes, history_planes.piece_planes)
+        np.copyto(self.turn_plane, history_planes.turn_plane)
+        self.start = history_planes.start
+
+    def push(self, planes):
+        """Adds the [3, 10, 9] planes (blue, red, turn) of the next position, as env.get_planes returns them."""
+        planes = np.asarray(planes)
+        piece_planes = np.moveaxis(planes[:2], 0, -1) / MAX_PIECE_CODE
+        self.piece_planes[:, :, :, self.start] = piece_planes
+        self.piece_planes[:, :, :, self.start + self.size] = piece_planes
+        self.turn_plane[:] = planes[2]
+        self.start = (self.start + 1) % self.size
+
+    def get_model_input(self):
+        """[10, 9, 2 * (num_state_history + 1) + 1] model input of the pushed positions, the blue planes and the red
+        planes from the oldest to the newest position and the turn plane of the newest position."""
+        height, width = self.turn_plane.shape
+        num_planes = self.size * 2
+        model_input = np.empty((height, width, num_planes + 1), dtype=np.float32)
+        # splitting the last axis keeps the reshape a view of model_input
+        model_input[:, :, :num_planes].reshape(height, width, 2, self.size)[...] = \
+            self.piece_planes[:, :, :, self.start:self.start + self.size]
+        model_input[:, :, num_planes] = self.turn_plane
+        return model_input
@@ -6,12 +6,8 @@ from game.game import Game
 
 
 def filter_action_probs(action_probs, action_probs2, legal_actions, env):
-    legal_action_probs = []
-    for legal_action in legal_actions:
-        legal_action = env.encode_action(legal_action)
-        legal_action_probs.append(action_probs[legal_action[0]] + action_probs2[legal_action[1]])
-
-    legal_action_probs = np.array(legal_action_probs)
+    from_squares, to_squares = env.encode_action(np.array(legal_actions))
+    legal_action_probs = action_probs[from_squares] + action_probs2[to_squares]
     if (legal_action_probs == 0).all():
         legal_action_probs = np.array([1. / len(legal_action_probs)] * len(legal_action_probs))
     else: